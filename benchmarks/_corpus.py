@@ -0,0 +1,75 @@
+"""
+Shared inputs for the tests and benchmarks: synthetic PDF page text and the
+text cleanup as it was before the single-pass normalizer.
+"""
+import random
+import re
+from utils.normalize_text import normalize_page_text
+
+
+WORDS = "the model data page result value section figure table method analysis report".split()
+
+
+def make_pages(megabytes, page_chars=3000, seed=6):
+    """Build raw page texts resembling PyPDF2 output: wrapped lines, sentences and numbered items."""
+    rng = random.Random(seed)
+    pages = []
+    total = 0
+    while total < megabytes * 1_000_000:
+        parts = []
+        length = 0
+        while length < page_chars:
+            if rng.random() < 0.1:
+                part = f"{rng.randint(1, 20)}. "
+            else:
+                words = rng.choices(WORDS, k=rng.randint(4, 14))
+                part = " ".join(words).capitalize() + rng.choice(".!?") + rng.choice([" ", "  ", "\n", " \n "])
+            parts.append(part)
+            length += len(part)
+        page = "".join(parts)
+        pages.append(page)
+        total += len(page)
+    return pages
+
+
+# Cleanup as it was before the single-pass normalizer, kept verbatim as the reference
+
+def legacy_clean_pdf_text(text):
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text)
+    text = text.replace('\n\n', '')
+    text = re.sub(r' +', ' ', text)
+    text = re.sub(r'(\w+[.!?])\s+([A-Z])', r'\1\n\n\2', text)
+    text = re.sub(r'(\d+\.\s+)', r'\n\1', text)
+    return text.strip()
+
+
+def legacy_final_text_cleanup(content):
+    content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)
+    content = re.sub(r'\n(\d+\.)', r'\n\n\1', content)
+    content = re.sub(r' +', ' ', content)
+    return content.strip()
+
+
+def legacy_format_pdf_content(raw_content):
+    formatted_content = '\n'.join(line.strip() for line in raw_content.split('\n') if line.strip())
+    while '\n\n\n' in formatted_content:
+        formatted_content = formatted_content.replace('\n\n\n', '\n\n')
+    return formatted_content
+
+
+def legacy_document(pages):
+    """Text of a document with the given raw pages, cleaned up the old way."""
+    return legacy_final_text_cleanup("".join(legacy_clean_pdf_text(page) for page in pages))
+
+
+def normalized_document(pages):
+    """Text of a document with the given raw pages, joined as extract_pdf_text does."""
+    return "".join(normalize_page_text(page) for page in pages).strip()
+
+
+def legacy_get_chunks(text, chunk_size=50):
+    """Fixed-size word chunks, as uploads were split before iter_chunks."""
+    words = text.split()
+    return [' '.join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size)]
@@ -0,0 +1,50 @@
+"""
+Benchmark of the token-budgeted chunker against the fixed word-count chunks it replaced.
+
+Reports chunk counts, token sizes, how many chunks end on a sentence
+boundary, throughput and peak memory for a multi-megabyte normalized document.
+
+Run from the repository root:
+    python -m benchmarks.bench_chunker [megabytes]
+"""
+import sys
+import time
+import tracemalloc
+from benchmarks._corpus import make_pages, normalized_document, legacy_get_chunks
+from utils.count_tokens import count_tokens
+from utils.iter_chunks import iter_chunks
+
+
+def measure(name, make_chunks, text):
+    """Chunk the text once for timing and memory, then describe the chunks."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = 0
+    for _ in make_chunks(text):
+        count += 1
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    sizes = []
+    sentence_ends = 0
+    for chunk in make_chunks(text):
+        sizes.append(count_tokens(chunk))
+        sentence_ends += chunk.rstrip()[-1:] in (".", "!", "?")
+    print(f"{name:<28}{count:>8}{sum(sizes) / count:>9.0f}{max(sizes):>9}{sentence_ends / count:>10.0%}"
+          f"{len(text) / 1e6 / seconds:>9.1f}{peak / 1e6:>10.1f}")
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    text = normalized_document(make_pages(megabytes))
+    print(f"{len(text) / 1e6:.1f} MB of normalized text")
+    print(f"{'chunker':<28}{'chunks':>8}{'avg tok':>9}{'max tok':>9}{'sentence':>10}{'MB/s':>9}{'peak MB':>10}")
+    measure("get_chunks(50 words)", lambda text: legacy_get_chunks(text, chunk_size=50), text)
+    measure("iter_chunks(200, overlap 30)", lambda text: (chunk['text'] for chunk in iter_chunks(text)), text)
+    measure("iter_chunks(200, overlap 0)",
+            lambda text: (chunk['text'] for chunk in iter_chunks(text, overlap_tokens=0)), text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Micro-benchmark of PDF text cleanup on a multi-megabyte document.
+
+Compares the single-pass normalizer with the regex passes it replaced and
+checks that both produce the same text.
+
+Run from the repository root:
+    python -m benchmarks.bench_normalize_text [megabytes]
+"""
+import sys
+import time
+from benchmarks._corpus import make_pages, legacy_document, normalized_document, legacy_format_pdf_content
+from utils.normalize_text import normalize_display_text
+
+
+def best_of(runs, function, *args):
+    """Fastest of several timed runs, and the last result."""
+    best = float('inf')
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    pages = make_pages(megabytes)
+    size = sum(map(len, pages)) / 1e6
+    print(f"{len(pages)} pages, {size:.1f} MB")
+
+    legacy_time, legacy = best_of(3, legacy_document, pages)
+    new_time, new = best_of(3, normalized_document, pages)
+    assert new == legacy, "normalized text differs from the legacy cleanup"
+    print(f"page cleanup     legacy {legacy_time:.3f}s  single-pass {new_time:.3f}s  ({legacy_time / new_time:.1f}x)")
+
+    legacy_time, legacy = best_of(3, legacy_format_pdf_content, new)
+    new_time, display = best_of(3, normalize_display_text, new)
+    assert display == legacy, "display text differs from the legacy formatting"
+    print(f"display format   legacy {legacy_time:.3f}s  single-pass {new_time:.3f}s  ({legacy_time / new_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Latency and recall benchmark of the Chroma and NumPy vector store backends.
+
+Builds the same collection of clustered, normalized embeddings in each
+backend and reports build time, query latency, on-disk size and recall of
+the top results against exact search. A second table stores the same
+vectors shortened to fewer dimensions, as EMBEDDING_DIMENSIONS does, and
+measures recall against exact search at full size. The vectors are
+synthetic, with variance decaying over the dimensions the way shortened
+embeddings concentrate information up front; measure real embeddings
+before relying on the shortened recall figures.
+
+Run from the repository root:
+    python -m benchmarks.bench_vector_store [chunks] [dimensions]
+"""
+import sys
+import tempfile
+import time
+import numpy as np
+from utils.vector_store import ChromaVectorStore, NumpyVectorStore
+
+QUERIES = 200
+TOP_K = 10
+BATCH_SIZE = 1000
+
+BACKENDS = [
+    ("chroma", lambda directory: ChromaVectorStore(directory)),
+    ("numpy float32", lambda directory: NumpyVectorStore(directory)),
+    ("numpy float16", lambda directory: NumpyVectorStore(directory, precision="float16")),
+    ("numpy int8", lambda directory: NumpyVectorStore(directory, precision="int8")),
+    ("numpy int8 + rerank", lambda directory: NumpyVectorStore(directory, precision="int8", rerank=True)),
+]
+
+# Shortened sizes compared against full-size exact search, and the backends run at each
+SHORTENED_DIMENSIONS = [1024, 512, 256]
+SHORTENED_BACKENDS = [BACKENDS[1], BACKENDS[4]]
+
+
+def make_vectors(count, dimensions, rng, clusters=50):
+    """Normalized vectors scattered around a few centers, as document chunks are."""
+    centers = rng.standard_normal((clusters, dimensions))
+    vectors = centers[rng.integers(clusters, size=count)] + 0.6 * rng.standard_normal((count, dimensions))
+    # Leading dimensions carry more of the signal, as in shortenable embeddings
+    vectors *= dimension_scale(dimensions)
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def dimension_scale(dimensions):
+    """Per-dimension spread that decays from the first dimension to the last."""
+    return 1 / np.sqrt(1 + np.arange(dimensions) / 64)
+
+
+def shorten(vectors, dimensions):
+    """Keep the leading dimensions and renormalize, as the embeddings API does."""
+    short = np.ascontiguousarray(vectors[:, :dimensions])
+    return short / np.linalg.norm(short, axis=1, keepdims=True)
+
+
+def run_backend(make_store, vectors, queries, truth):
+    """Build a collection, query it and measure the results."""
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory)
+        collection = store.get_collection("bench")
+        ids = [f"chunk-{i}" for i in range(len(vectors))]
+
+        started = time.perf_counter()
+        for start in range(0, len(vectors), BATCH_SIZE):
+            end = start + BATCH_SIZE
+            collection.upsert(
+                ids=ids[start:end],
+                embeddings=vectors[start:end].tolist(),
+                documents=[f"Text of chunk {i}" for i in range(start, min(end, len(vectors)))],
+                metadatas=[{'chunk_index': i} for i in range(start, min(end, len(vectors)))]
+            )
+        build_seconds = time.perf_counter() - started
+
+        latencies = []
+        hits = 0
+        for query, expected in zip(queries, truth):
+            started = time.perf_counter()
+            result = collection.query(query_embeddings=[query.tolist()], n_results=TOP_K, include=["distances"])
+            latencies.append(time.perf_counter() - started)
+            found = {int(chunk_id.split("-")[1]) for chunk_id in result['ids'][0]}
+            hits += len(found & set(expected))
+
+        size = store.collection_size("bench")
+        store.delete_collection("bench")
+
+    latencies = np.array(latencies) * 1000
+    return {
+        'build_seconds': build_seconds,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'recall': hits / (len(queries) * TOP_K),
+        'size_mb': size / 1e6
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    dimensions = int(sys.argv[2]) if len(sys.argv) > 2 else 1536
+    rng = np.random.default_rng(13)
+    vectors = make_vectors(count, dimensions, rng)
+
+    # Queries near stored chunks, with exact top-k as ground truth
+    noise = 0.3 * rng.standard_normal((QUERIES, dimensions)) * dimension_scale(dimensions)
+    queries = vectors[rng.integers(count, size=QUERIES)] + noise.astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = np.argsort(-(queries.astype(np.float64) @ vectors.T.astype(np.float64)), axis=1)[:, :TOP_K]
+
+    print(f"{count} chunks, {dimensions} dimensions, {QUERIES} queries, recall@{TOP_K}")
+    print(f"{'backend':<22}{'build s':>9}{'p50 ms':>9}{'p95 ms':>9}{'recall':>9}{'size MB':>9}")
+    for name, make_store in BACKENDS:
+        result = run_backend(make_store, vectors, queries, truth)
+        print(f"{name:<22}{result['build_seconds']:>9.2f}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+              f"{result['recall']:>9.3f}{result['size_mb']:>9.1f}")
+
+    # Shortened vectors, scored against the exact top-k at full size
+    print(f"\nshortened dimensions, recall@{TOP_K} against exact search at {dimensions}")
+    print(f"{'dims':<6}{'backend':<22}{'p50 ms':>9}{'recall':>9}{'size MB':>9}")
+    for short in [d for d in SHORTENED_DIMENSIONS if d < dimensions]:
+        for name, make_store in SHORTENED_BACKENDS:
+            result = run_backend(make_store, shorten(vectors, short), shorten(queries, short), truth)
+            print(f"{short:<6}{name:<22}{result['p50_ms']:>9.2f}{result['recall']:>9.3f}{result['size_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,25 @@ from utils.db_compatibility import setup_sqlite3_compatibility
 setup_sqlite3_compatibility()
 
 import streamlit as st
-import PyPDF2
-import io
-import os
 import time
-import chromadb
-from chromadb.config import Settings
-from openai import OpenAI
 
 # Import custom functions
-from utils.handle_file_upload import handle_file_upload
-from utils.handle_result import handle_result
+from utils.handle_result import handle_result_stream
 from utils.formate_file_size import format_file_size
+from utils.format_pdf_content import truncate_page_text
+from utils.document_store import get_document_store
+from utils.collection_eviction import get_collection_eviction_manager
 from utils.truncate_filename import truncate_filename
-from utils.handle_db import clear_chroma_db
-from utils.process_pdf_content import process_pdf_content
-from utils.sanitize_collection_name import sanitize_collection_name
+from utils.ingestion_jobs import submit_ingestion_job, get_ingestion_job, ensure_document_indexed
+from utils.handle_db import get_vector_collection
+from utils.document_insights import get_document_insights, INSIGHT_PROMPTS
+from utils.answer_memo import get_answer_memo_key, get_memoized_answer, memoize_answer
 
 # PDF-only document analyzer - no image support
 
+# Selected documents previewed side by side; with more, one is picked to preview
+MAX_PREVIEWS = 2
+
 # ---------------------------
 # Streamlit Page Config
 # ---------------------------
@@ -242,10 +242,39 @@ st.markdown("""
 if 'uploaded_documents' not in st.session_state:
     st.session_state.uploaded_documents = []  # Array to store uploaded files temporarily
 if 'selected_doc_indices' not in st.session_state:
-    st.session_state.selected_doc_indices = []  # Array to store indices of selected documents (max 2)
+    st.session_state.selected_doc_indices = []  # Array to store indices of selected documents
 if 'session_id' not in st.session_state:
     st.session_state.session_id = int(time.time())
 
+# ---------------------------
+# Background Ingestion Sync
+# ---------------------------
+def sync_ingestion_jobs():
+    """Copy finished ingestion jobs into this session's documents and collect expired stored ones."""
+    changed = False
+    for doc in st.session_state.uploaded_documents:
+        # Keep this session's stored files and collections from being garbage collected
+        get_document_store().touch(doc['doc_id'])
+        get_collection_eviction_manager().touch(doc['collection'])
+        if doc.get('status') != 'indexing':
+            continue
+        job = get_ingestion_job(doc['job_id'])
+        if job is None:
+            doc['status'] = 'failed'
+            doc['error'] = "Error reading PDF: indexing job was lost"
+            changed = True
+        elif job.is_finished:
+            doc['error'] = job.error
+            doc['record'] = job.record
+            doc['status'] = 'ready' if job.status == 'done' else 'failed'
+            changed = True
+    # After touching this session's documents, so they are never collected. Runs
+    # at most every GC_INTERVAL_SECONDS, and not only when someone uploads
+    get_document_store().collect_garbage()
+    return changed
+
+sync_ingestion_jobs()
+
 # ---------------------------
 # Upload Dialog Function
 # ---------------------------
@@ -306,50 +335,39 @@ def upload_dialog():
     if uploaded_file:
         # Check if file already exists
         if not any(doc['name'] == uploaded_file.name for doc in st.session_state.uploaded_documents):
-            # Process PDF using utility function
-            with st.spinner("Processing PDF..."):
-                content = process_pdf_content(uploaded_file)
-                
-                if uploaded_file.type == "application/pdf":
-                    if content and not content.startswith("Error") and content != "No text content found in PDF":
-                        try:
-                            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                            word_count = len(content.split())
-                            st.success(f"✅ PDF processed successfully - {len(pdf_reader.pages)} pages, {word_count} words")
-                        except:
-                            st.success("✅ PDF processed successfully")
-                    elif content == "No text content found in PDF":
-                        st.warning("⚠️ No text content found in PDF")
-                    else:
-                        st.error(f"❌ PDF processing failed: {content}")
-                else:
-                    st.error("❌ Only PDF files are supported")
+            # Extract and index on the shared worker pool instead of blocking this session.
+            # PDFs indexed before, by any session or under another name, are ready at once
+            job_id = submit_ingestion_job(uploaded_file.name, uploaded_file.type, uploaded_file.getvalue())
+            job = get_ingestion_job(job_id)
+            duplicate = next((doc for doc in st.session_state.uploaded_documents if doc['doc_id'] == job.doc_id), None)
             
-            # Store document info in temporary array
-            doc_info = {
-                'name': uploaded_file.name,
-                'type': uploaded_file.type,
-                'size': uploaded_file.size,
-                'content': content,
-                'file_obj': uploaded_file,
-                'upload_time': time.time()  # Track when uploaded
-            }
-            st.session_state.uploaded_documents.append(doc_info)  # Add to archived array
-            
-            # Auto-select new document (max 2 selections)
-            new_doc_index = len(st.session_state.uploaded_documents) - 1
-
-            if len(st.session_state.selected_doc_indices) < 2:
-                st.session_state.selected_doc_indices.append(new_doc_index)
-                with st.spinner("Processing PDF content..."):
-                    handle_file_upload(st.session_state.uploaded_documents[new_doc_index])
+            if duplicate:
+                st.warning(f"'{uploaded_file.name}' has the same content as '{duplicate['name']}', which is already uploaded.")
             else:
-                # Replace oldest selection with new document
-                with st.spinner("Processing PDF content..."):
-                    handle_file_upload(st.session_state.uploaded_documents[new_doc_index])
+                # Store document info in temporary array
+                doc_info = {
+                    'name': uploaded_file.name,
+                    'type': uploaded_file.type,
+                    'doc_id': job.doc_id,  # PDF and text live in the document store
+                    'collection': job.collection,  # Named after the content hash, shared by identical PDFs
+                    'record': None,  # Page/word counts, size and hashes, filled in when the job finishes
+                    'error': None,
+                    'upload_time': time.time(),  # Track when uploaded
+                    'job_id': job_id,
+                    'status': 'indexing'
+                }
+                st.session_state.uploaded_documents.append(doc_info)  # Add to archived array
+                
+                # Auto-select new document
+                new_doc_index = len(st.session_state.uploaded_documents) - 1
+                st.session_state.selected_doc_indices.append(new_doc_index)
 
-            st.success(f"✅ Added PDF document: {uploaded_file.name}")
-            st.info("📁 Document stored in temporary archive (will be cleared on page refresh)")
+                st.success(f"✅ Added PDF document: {uploaded_file.name}")
+                if job.is_finished:
+                    st.info("⚡ This PDF was indexed before - it is ready to use")
+                else:
+                    st.info("⏳ Extracting and indexing in the background - you can keep working while it finishes")
+                st.info("📁 Document stored in temporary archive (will be cleared on page refresh)")
 
         else:
             st.warning(f"File '{uploaded_file.name}' is already uploaded.")
@@ -364,6 +382,59 @@ def upload_dialog():
             if uploaded_file:
                 st.rerun()
 
+# ---------------------------
+# Indexing Progress Fragment
+# ---------------------------
+@st.fragment(run_every=2)
+def indexing_progress():
+    # Rerun the whole app once a job finishes so previews and questions pick it up
+    if sync_ingestion_jobs():
+        st.rerun()
+    
+    for doc in st.session_state.uploaded_documents:
+        if doc.get('status') == 'indexing':
+            job = get_ingestion_job(doc['job_id'])
+            st.caption(f"⏳ {truncate_filename(doc['name'])}: {job.progress_text() if job else 'Indexing...'}")
+
+# ---------------------------
+# Document Selection
+# ---------------------------
+def format_document_option(doc):
+    """Label of a document in the selector: status icon and truncated name."""
+    # PDF icon, or the indexing state while the background job runs
+    status = doc.get('status')
+    icon = "⏳" if status == 'indexing' else "⚠️" if status == 'failed' else "📄"
+    return f"{icon} {truncate_filename(doc['name'])}"
+
+
+def select_documents(indices):
+    """
+    Replace the selection. Selection only picks which collections questions
+    search; every document stays indexed.
+    """
+    newly_selected = [i for i in indices if i not in st.session_state.selected_doc_indices]
+    st.session_state.selected_doc_indices = list(indices)
+    for i in newly_selected:
+        # Rebuild the index from the stored text if it was evicted meanwhile
+        reindex_document(st.session_state.uploaded_documents[i])
+
+
+def reindex_document(doc):
+    """
+    Start rebuilding a ready document's index if it is no longer complete.
+
+    Returns:
+        bool: True if the document is being indexed again
+    """
+    if doc.get('status') != 'ready':
+        return False
+    job_id = ensure_document_indexed(doc['name'], doc['type'], doc['doc_id'])
+    if not job_id:
+        return False
+    doc['job_id'] = job_id
+    doc['status'] = 'indexing'
+    return True
+
 # ---------------------------
 # SIDEBAR - SOURCES PANEL
 # ---------------------------
@@ -386,52 +457,42 @@ with st.sidebar:
     if st.button("➕ Add", key="add_btn", use_container_width=True):
         upload_dialog()
     
-    # Document list (multi-selection, max 2)
+    # Live progress for documents still being indexed in the background
+    if any(doc.get('status') == 'indexing' for doc in st.session_state.uploaded_documents):
+        indexing_progress()
+    
+    # Document list (multi-selection). One searchable widget scales to hundreds
+    # of sources, where a button per document would be rendered on every rerun
     if st.session_state.uploaded_documents:
         st.markdown("---")
         
         # Show selection info
         selected_count = len(st.session_state.selected_doc_indices)
         if selected_count > 0:
-            st.caption(f"📋 {selected_count}/2 documents selected")
+            st.caption(f"📋 {selected_count}/{doc_count} documents selected")
         else:
-            st.caption("📋 Select up to 2 documents")
+            st.caption("📋 Select documents to ask questions about")
         
-        for i, doc in enumerate(st.session_state.uploaded_documents):
-            # PDF icon only
-            icon = "📄"
-            
-            # Check if this document is selected
-            is_selected = i in st.session_state.selected_doc_indices
-            
-            # Truncate long filenames
-            display_name = truncate_filename(doc['name'])
-            
-            # Create clickable document item
-            if st.button(
-                f"{icon} {display_name}",
-                key=f"doc_button_{i}",
-                use_container_width=True,
-                type="primary" if is_selected else "secondary"
-            ):
-                # Toggle selection with max 2 documents
-                if i in st.session_state.selected_doc_indices:
-                    # Deselect if already selected
-                    st.session_state.selected_doc_indices.remove(i)
-                    # Clear ChromaDB if no documents selected
-                    if len(st.session_state.selected_doc_indices) == 0:
-                        clear_chroma_db()
-                        # Rebuild ChromaDB with remaining selected documents
-                else:
-                    # Select document (max 2)
-                    if len(st.session_state.selected_doc_indices) < 2:
-                        st.session_state.selected_doc_indices.append(i)
-                    else:
-                        # Replace oldest selection
-                        st.session_state.selected_doc_indices.pop(0)
-                        st.session_state.selected_doc_indices.append(i)
-                        # Clear and rebuild ChromaDB with new selections
-                st.rerun()
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button("Select all", key="select_all_btn", use_container_width=True,
+                      on_click=select_documents, args=(list(range(doc_count)),))
+        with col2:
+            st.button("Select none", key="select_none_btn", use_container_width=True,
+                      on_click=select_documents, args=([],))
+        
+        # The widget mirrors selected_doc_indices, which uploads also change
+        st.session_state.doc_selector = list(st.session_state.selected_doc_indices)
+        labels = [format_document_option(doc) for doc in st.session_state.uploaded_documents]
+        st.multiselect(
+            "Documents",
+            options=list(range(doc_count)),
+            format_func=lambda i: labels[i],
+            key="doc_selector",
+            on_change=lambda: select_documents(st.session_state.doc_selector),
+            placeholder="Search documents...",
+            label_visibility="collapsed"
+        )
     
     # Clear All button at bottom of sidebar
     if st.session_state.uploaded_documents:
@@ -439,7 +500,8 @@ with st.sidebar:
         if st.button("🗑️ Clear All", type="secondary", use_container_width=True):
             st.session_state.uploaded_documents = []  # Clear the archived array
             st.session_state.selected_doc_indices = []  # Reset selections
-            clear_chroma_db()  # Clear ChromaDB when clearing all documents
+            # Collections are shared with other sessions that uploaded the same PDFs,
+            # so they are left for the eviction manager to expire once idle
             st.rerun()
 
 # ---------------------------
@@ -464,41 +526,89 @@ if st.session_state.uploaded_documents and has_selection:
     # Get selected documents
     selected_docs = [st.session_state.uploaded_documents[i] for i in st.session_state.selected_doc_indices]
     
+    # A document that stays selected can still be evicted; rebuild it rather than
+    # let questions silently skip it, and rerun so the sidebar shows its progress
+    evicted = [
+        doc for doc in selected_docs
+        if doc.get('status') == 'ready' and not get_vector_collection(doc['collection'], create=False)
+    ]
+    if any([reindex_document(doc) for doc in evicted]):
+        st.rerun()
+    
     # Left Column - Document Preview
     with preview_col:
         st.header(f"👁️ PDF Preview ({selected_count} selected)")
         
-        # Display each selected document
-        for idx, selected_doc in enumerate(selected_docs):
+        # Preview each selected document, or one chosen document when many are selected
+        preview_docs = selected_docs
+        if selected_count > MAX_PREVIEWS:
+            # Options are doc ids, so the choice follows the document when the selection changes
+            names = {doc['doc_id']: doc['name'] for doc in selected_docs}
+            preview_choice = st.selectbox(
+                "Preview document",
+                options=list(names),
+                format_func=names.get,
+                key="preview_choice"
+            )
+            preview_docs = [next((doc for doc in selected_docs if doc['doc_id'] == preview_choice), selected_docs[0])]
+        
+        for idx, selected_doc in enumerate(preview_docs):
             # Add separator between documents
             if idx > 0:
                 st.markdown("---")
             
-            # File metadata
-            size_text = format_file_size(selected_doc['size'])
-            
             # Document header            
+            # Documents still being indexed have no extracted text yet
+            if selected_doc.get('status') == 'indexing':
+                job = get_ingestion_job(selected_doc['job_id'])
+                st.markdown(f"**{selected_doc['name']}**")
+                st.info(f"⏳ {job.progress_text() if job else 'Indexing...'}")
+                continue
+            
+            # File metadata, recorded once by the ingestion job. Failed jobs keep the
+            # record of whatever was extracted, so their error is shown first
+            record = selected_doc.get('record')
+            if record is None or selected_doc.get('status') == 'failed':
+                st.markdown(f"**{selected_doc['name']}**")
+                st.warning(f"⚠️ {selected_doc.get('error') or 'No text content available in this PDF'}")
+                if record is None or not record.word_count:
+                    continue
+            
             # PDF Preview
             try:
-                pdf_reader = PyPDF2.PdfReader(selected_doc['file_obj'])
-                page_count = len(pdf_reader.pages)
+                size_text = format_file_size(record.size)
                 
                 st.markdown(f"""
-                <div class="file-info">📄 PDF • {page_count} page(s) • {size_text}</div>
+                <div class="file-info">📄 PDF • {record.page_count} page(s) • {size_text}</div>
                 """, unsafe_allow_html=True)
                 
-                if selected_doc['content'] and selected_doc['content'].strip() and not selected_doc['content'].startswith("Error"):
-                    word_count = len(selected_doc['content'].split())
-                    st.success(f"✅ Text extracted: {word_count} words")
+                if record.word_count:
+                    st.success(f"✅ Text extracted: {record.word_count} words")
+                    
+                    # Page through the text; only the visible page is sent to the browser
+                    page_key = f"preview_page_{selected_doc['job_id']}"
+                    page_total = max(len(record.page_offsets), 1)
+                    page = min(st.session_state.get(page_key, 0), page_total - 1)
                     
-                    # Display content in a text area (smaller height for multiple docs)
-                    content_height = 400 if selected_count == 1 else 200
+                    prev_col, page_col, next_col = st.columns([1, 2, 1])
+                    with prev_col:
+                        if st.button("◀ Prev", key=f"{page_key}_prev", use_container_width=True, disabled=page == 0):
+                            page -= 1
+                    with next_col:
+                        if st.button("Next ▶", key=f"{page_key}_next", use_container_width=True, disabled=page >= page_total - 1):
+                            page += 1
+                    st.session_state[page_key] = page
+                    with page_col:
+                        st.caption(f"Page {page + 1} of {page_total}")
+                    
+                    # Display the page in a text area (smaller height for multiple docs)
+                    content_height = 400 if len(preview_docs) == 1 else 200
                     st.text_area(
                         f"📖 Content Preview - Document {idx + 1}",
-                        selected_doc['content'],
+                        truncate_page_text(get_document_store().read_page(selected_doc['doc_id'], page)),
                         height=content_height,
-                        key=f"pdf_content_preview_{idx}",
-                        help="Full PDF text content",
+                        key=f"pdf_content_preview_{selected_doc['doc_id']}_{page}",
+                        help="PDF text content, one page at a time",
                         disabled=True
                     )
                 else:
@@ -529,49 +639,73 @@ if st.session_state.uploaded_documents and has_selection:
         # Initialize session state for button responses
         if 'button_response' not in st.session_state:
             st.session_state.button_response = None
+        if 'button_question' not in st.session_state:
+            st.session_state.button_question = None
         
+        # Buttons only record which insight was asked for; the answer is served below
         with col1:
             if st.button("📝 Summarize", use_container_width=True, key="summarize_btn"):
-                with st.spinner("🤖 Getting AI response..."):
-                    response = handle_result("Provide a brief summary of this document.", st.session_state.selected_doc_indices, st.session_state.uploaded_documents)
-                    st.session_state.button_response = response if response else "⚠️ Unable to get AI response. Please check your API key and try again."
+                st.session_state.button_question = 'summary'
          
         
         with col2:
             if st.button("🔍 Key Points", use_container_width=True, key="keypoints_btn"):
-                with st.spinner("🤖 Getting AI response..."):
-                    response = handle_result("What are the main key points in this document?", st.session_state.selected_doc_indices, st.session_state.uploaded_documents)
-                    st.session_state.button_response = response if response else "⚠️ Unable to get AI response. Please check your API key and try again."
+                st.session_state.button_question = 'key_points'
 
         with col3:
             if st.button("📊 Details", use_container_width=True, key="details_btn"):
-                with st.spinner("🤖 Getting AI response..."):
-                    response = handle_result("What are the most important details I should know?", st.session_state.selected_doc_indices, st.session_state.uploaded_documents)
-                    st.session_state.button_response = response if response else "⚠️ Unable to get AI response. Please check your API key and try again."
+                st.session_state.button_question = 'details'
+        
+        # Serve precomputed insights instantly when every selected document has them
+        if st.session_state.button_question:
+            insights = [get_document_insights(doc['record'].content_hash) if doc.get('record') and doc['record'].content_hash else None for doc in selected_docs]
+            if all(insights):
+                if len(selected_docs) == 1:
+                    st.session_state.button_response = insights[0][st.session_state.button_question]
+                else:
+                    st.session_state.button_response = "\n\n".join(
+                        f"**{doc['name']}**\n\n{insight[st.session_state.button_question]}"
+                        for doc, insight in zip(selected_docs, insights)
+                    )
+                st.session_state.button_question = None
+        
+        # Otherwise stream a live answer and keep the final text for reruns
+        if st.session_state.button_question:
+            st.markdown("### 🤖 AI Response:")
+            response = st.write_stream(handle_result_stream(INSIGHT_PROMPTS[st.session_state.button_question], st.session_state.selected_doc_indices, st.session_state.uploaded_documents))
+            st.session_state.button_question = None
+            st.session_state.button_response = response if response else "⚠️ Unable to get AI response. Please check your API key and try again."
+            if not response:
+                st.write(st.session_state.button_response)
         
         # Display button response if available
-        if st.session_state.button_response:
+        elif st.session_state.button_response:
             st.markdown("### 🤖 AI Response:")
             st.write(st.session_state.button_response)
-            
-            # Clear response button
+        
+        # Clear response button
+        if st.session_state.button_response:
             if st.button("🗑️ Clear Response", type="secondary", key="clear_response_btn"):
                 st.session_state.button_response = None
                 st.rerun()
         
-        # Show AI response if there's a question
+        # Show AI response if there's a question. The text input keeps its value,
+        # so reruns show the memoized answer until the question or documents change
         if question and question.strip():
-            with st.spinner("🤖 Getting AI response..."):
-                response_text = handle_result(question, st.session_state.selected_doc_indices, st.session_state.uploaded_documents)
-                if response_text:
-                    st.markdown("### 🤖 AI Response:")
-                    st.write(response_text)
-                else:
-                    st.warning("⚠️ Unable to get AI response. Please check your API key and try again.")
+            st.markdown("### 🤖 AI Response:")
+            memo_key = get_answer_memo_key(question, selected_docs)
+            response_text = get_memoized_answer(memo_key)
+            if response_text:
+                st.write(response_text)
+            else:
+                response_text = st.write_stream(handle_result_stream(question, st.session_state.selected_doc_indices, st.session_state.uploaded_documents))
+                memoize_answer(memo_key, response_text)
+            if not response_text:
+                st.warning("⚠️ Unable to get AI response. Please check your API key and try again.")
         
     
 elif st.session_state.uploaded_documents:
-    st.info("👆 Please select up to 2 PDF documents from the sidebar to start asking questions")
+    st.info("👆 Please select PDF documents from the sidebar to start asking questions")
 else:
     st.info("👆 Click '➕ Add' in the sidebar to upload your first PDF document")
 
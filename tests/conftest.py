@@ -0,0 +1,143 @@
+import hashlib
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from openai import OpenAI
+
+
+class FakeOpenAI:
+    """
+    Local stand-in for the OpenAI API.
+
+    Serves /embeddings with vectors derived from each input's hash and
+    /chat/completions as JSON or server-sent events. Responses queued with
+    fail() are sent first, so tests can inject rate limits and errors, and
+    every request waits `delay` seconds to simulate latency. Setting
+    `stream_cut_after` drops streams after that many events.
+    """
+
+    def __init__(self, delay=0.0, dimension=8):
+        self.delay = delay
+        self.dimension = dimension
+        self.stream_words = ["Hello", "from", "the", "fake", "server."]
+        self.stream_delay = 0.0
+        self.stream_cut_after = None  # number of events sent before a stream is cut off
+        self.requests = []  # (path, body, time received)
+        self.max_in_flight = 0
+        self._failures = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        # Clients closing idle or abandoned connections are expected, not errors
+        self._server.handle_error = lambda request, client_address: None
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def client(self):
+        """OpenAI client pointed at this server, without the SDK's own retries."""
+        return OpenAI(api_key="test", base_url=self.base_url, max_retries=0)
+
+    def fail(self, status, message="Injected error", headers=None):
+        """Answer the next request with an error response."""
+        self._failures.append((status, message, headers or {}))
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with fake._lock:
+                    fake.requests.append((self.path, body, time.monotonic()))
+                    fake._in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake._in_flight)
+                    failure = fake._failures.pop(0) if fake._failures else None
+                try:
+                    time.sleep(fake.delay)
+                    if failure:
+                        status, message, headers = failure
+                        self._send_json(status, {'error': {'message': message, 'type': 'error', 'code': None}}, headers)
+                    elif self.path.endswith("/embeddings"):
+                        self._send_json(200, fake._embeddings(body))
+                    elif body.get('stream'):
+                        self._send_stream(body)
+                    else:
+                        self._send_json(200, fake._completion(body))
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with fake._lock:
+                        fake._in_flight -= 1
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, body):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                deltas = [({'content': word + " "}, None) for word in fake.stream_words] + [({}, 'stop')]
+                for i, (delta, finish_reason) in enumerate(deltas):
+                    if i == fake.stream_cut_after:
+                        # Drop the connection mid-body, as a failing upstream would
+                        self.close_connection = True
+                        return
+                    event = {'id': 'chatcmpl-test', 'object': 'chat.completion.chunk', 'created': 0,
+                             'model': body['model'],
+                             'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]}
+                    self._send_chunk(b"data: " + json.dumps(event).encode() + b"\n\n")
+                    time.sleep(fake.stream_delay)
+                self._send_chunk(b"data: [DONE]\n\n")
+                self._send_chunk(b"")
+
+            def _send_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+    def _embeddings(self, body):
+        inputs = body['input'] if isinstance(body['input'], list) else [body['input']]
+        dimension = body.get('dimensions', self.dimension)
+        data = []
+        for i, text in enumerate(inputs):
+            digest = hashlib.sha256(str(text).encode()).digest()
+            data.append({'object': 'embedding', 'index': i,
+                         'embedding': [(byte - 128) / 128 for byte in digest[:dimension]]})
+        # The API does not promise input order, so exercise callers that sort by index
+        data.reverse()
+        return {'object': 'list', 'data': data, 'model': body['model'],
+                'usage': {'prompt_tokens': len(inputs), 'total_tokens': len(inputs)}}
+
+    def _completion(self, body):
+        return {'id': 'chatcmpl-test', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': " ".join(self.stream_words)}}],
+                'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}}
+
+
+@pytest.fixture
+def fake_openai():
+    server = FakeOpenAI()
+    yield server
+    server.close()
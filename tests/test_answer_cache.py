@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+import utils.answer_cache
+from utils.answer_cache import AnswerCache
+
+
+def unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = AnswerCache(path=str(tmp_path / "answers.sqlite3"), threshold=0.95)
+    yield cache
+    cache.close()
+
+
+def test_serves_similar_questions_above_the_threshold(cache):
+    doc_set = AnswerCache.doc_set_key(["ns.doc_a"], "gpt-4")
+    cache.put(doc_set, "model", "What is it?", unit([1.0, 0.0, 0.0]), "An answer.")
+
+    # Cosine similarity 0.99 is served, 0.9 is not
+    assert cache.lookup(doc_set, "model", unit([1.0, 0.142, 0.0])) == "An answer."
+    assert cache.lookup(doc_set, "model", unit([1.0, 0.484, 0.0])) is None
+    # Nor is the same question about other documents or from another embedder
+    assert cache.lookup(AnswerCache.doc_set_key(["ns.doc_b"], "gpt-4"), "model", unit([1.0, 0.0, 0.0])) is None
+    assert cache.lookup(doc_set, "other-model", unit([1.0, 0.0, 0.0])) is None
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 3)
+
+
+def test_threshold_above_one_disables_reuse(tmp_path):
+    cache = AnswerCache(path=str(tmp_path / "answers.sqlite3"), threshold=1.01)
+    cache.put("docs", "model", "What is it?", unit([1.0, 2.0]), "An answer.")
+
+    assert cache.lookup("docs", "model", unit([1.0, 2.0])) is None
+    cache.close()
+
+
+def test_expired_answers_are_not_served_and_are_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(utils.answer_cache.time, "time", lambda: now[0])
+    cache = AnswerCache(path=str(tmp_path / "answers.sqlite3"), ttl_seconds=60)
+    cache.put("docs", "model", "Old question?", unit([1.0, 0.0]), "Old answer.")
+
+    now[0] += 59
+    assert cache.lookup("docs", "model", unit([1.0, 0.0])) == "Old answer."
+    now[0] += 2
+    assert cache.lookup("docs", "model", unit([1.0, 0.0])) is None
+
+    cache.put("docs", "model", "New question?", unit([0.0, 1.0]), "New answer.")
+    assert cache.stats()['entries'] == 1
+    cache.close()
+
+
+def test_doc_set_key_ignores_collection_order_but_not_settings():
+    key = AnswerCache.doc_set_key(["ns.doc_a", "ns.doc_b"], 12, "gpt-4")
+
+    assert key == AnswerCache.doc_set_key(["ns.doc_b", "ns.doc_a", "ns.doc_a"], 12, "gpt-4")
+    assert key != AnswerCache.doc_set_key(["ns.doc_a", "ns.doc_b"], 8, "gpt-4")
@@ -0,0 +1,146 @@
+import hashlib
+import threading
+import time
+import numpy as np
+import pytest
+import utils.embedders
+import utils.embedding_cache
+from utils.embed_chunks import batch_chunks, embed_chunks
+from utils.embedders import Embedder, OpenAIEmbedder
+from utils.embedding_cache import EmbeddingCache
+
+
+def fake_vector(text, dimension=8):
+    # The vector the fake server returns for a text
+    return [(byte - 128) / 128 for byte in hashlib.sha256(text.encode()).digest()[:dimension]]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "embeddings.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def test_batch_chunks_respects_size_and_char_limits():
+    chunks = ["x" * length for length in [3, 3, 3, 3, 9, 1, 20, 2]]
+
+    batches = list(batch_chunks(chunks, max_batch_size=3, max_batch_chars=10))
+
+    assert [batch for _, batch in batches] == [
+        ["xxx", "xxx", "xxx"], ["xxx"], ["x" * 9, "x"], ["x" * 20], ["xx"]
+    ]
+    # Start indices locate each batch in the input
+    assert [start for start, _ in batches] == [0, 3, 4, 6, 7]
+
+
+def test_batch_chunks_uses_get_text():
+    chunks = [{'text': "a" * 6}, {'text': "b" * 6}]
+    batches = list(batch_chunks(chunks, max_batch_chars=10, get_text=lambda chunk: chunk['text']))
+    assert [len(batch) for _, batch in batches] == [1, 1]
+
+
+class GatedEmbedder(Embedder):
+    """Embedder whose requests wait for a gate, counting how many run at once."""
+
+    model_id = "gated"
+    dimension = 2
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def embed(self, texts, priority=None):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.gate.wait(timeout=5)
+        with self._lock:
+            self.running -= 1
+        return np.array([[float(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_embed_chunks_bounds_pending_batches_and_keeps_order():
+    embedder = GatedEmbedder()
+    pulled = []
+
+    def chunks():
+        for i in range(100):
+            pulled.append(i)
+            yield str(i)
+
+    results = []
+    consumer = threading.Thread(
+        target=lambda: results.extend(embed_chunks(chunks(), max_batch_size=5, max_workers=2, embedder=embedder)),
+        daemon=True
+    )
+    consumer.start()
+    time.sleep(0.2)
+    # Two workers and at most four pending batches, plus the one chunk that closed the last batch
+    assert embedder.max_running == 2
+    assert len(pulled) <= 4 * 5 + 1
+    embedder.gate.set()
+    consumer.join(timeout=5)
+
+    assert sum(len(batch) for _, batch, _ in results) == 100
+    for start, batch, vectors in results:
+        # Every vector belongs to the chunk at the same position of its batch
+        assert batch == [str(i) for i in range(start, start + len(batch))]
+        assert vectors[:, 0].tolist() == [float(text) for text in batch]
+
+
+def test_embed_chunks_against_fake_server(fake_openai, cache, monkeypatch):
+    monkeypatch.setattr(utils.embedders, "get_embedding_cache", lambda: cache)
+    fake_openai.delay = 0.05
+    embedder = OpenAIEmbedder(dimensions=8, client=fake_openai.client())
+    texts = [f"chunk {i}" for i in range(40)]
+
+    vectors = {}
+    for start, batch, embeddings in embed_chunks(texts, max_batch_size=8, max_workers=2, embedder=embedder):
+        assert embeddings is not None
+        vectors.update(zip(batch, embeddings))
+
+    assert len(fake_openai.requests) == 5
+    assert fake_openai.max_in_flight == 2
+    for text in texts:
+        assert vectors[text] == pytest.approx(fake_vector(text), abs=1e-6)
+
+    # A second pass is served from the cache
+    list(embed_chunks(texts, max_batch_size=8, embedder=embedder))
+    assert len(fake_openai.requests) == 5
+
+
+def test_embedding_cache_hit_miss_and_normalization(cache):
+    cache.put_many("model", ["hello  world"], [[0.5, -0.25]])
+
+    assert cache.get_many("model", ["hello world\n", "other", "hello world"]) == [[0.5, -0.25], None, [0.5, -0.25]]
+    assert cache.get_many("other-model", ["hello world"]) == [None]
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (2, 2, 1)
+
+
+def test_embedding_cache_round_trips_float32(cache):
+    vector = np.random.default_rng(1).standard_normal(64).astype(np.float32)
+    cache.put_many("model", ["text"], [vector.tolist()])
+
+    stored = np.array(cache.get_many("model", ["text"])[0], dtype=np.float32)
+    assert np.array_equal(stored, vector)
+    assert cache.stats()['bytes'] == 64 * 4
+
+
+def test_embedding_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    clock = iter(range(1000))
+    monkeypatch.setattr(utils.embedding_cache.time, "time", lambda: next(clock))
+    # Room for three 4-float vectors
+    cache = EmbeddingCache(path=str(tmp_path / "embeddings.sqlite3"), max_bytes=3 * 16)
+    for text in ["a", "b", "c"]:
+        cache.put_many("model", [text], [[1.0, 2.0, 3.0, 4.0]])
+    cache.get_many("model", ["a"])
+
+    cache.put_many("model", ["d"], [[1.0, 2.0, 3.0, 4.0]])
+
+    # "b" was used least recently; eviction frees down to 90% of the budget
+    assert [vector is not None for vector in cache.get_many("model", ["a", "b", "c", "d"])] == [True, False, False, True]
+    cache.close()
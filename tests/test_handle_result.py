@@ -0,0 +1,93 @@
+import pytest
+import utils.handle_result as handle_result
+from utils.answer_cache import AnswerCache
+from utils.embedders import LocalHashEmbedder
+from utils.openai_gateway import OpenAIGateway
+
+DOCUMENTS = [{'name': "report.pdf", 'collection': "test.doc_report", 'status': 'ready'}]
+HITS = [{'id': "c1", 'collection': "test.doc_report", 'distance': 0.2,
+         'document': "The report covers quarterly results.", 'metadata': {'start': 0, 'end': 36, 'chunk_index': 0}}]
+
+
+@pytest.fixture
+def answering(fake_openai, tmp_path, monkeypatch):
+    """handle_result wired to the fake server, a fresh gateway and a temporary answer cache."""
+    cache = AnswerCache(path=str(tmp_path / "answers.sqlite3"))
+    gateway = OpenAIGateway(max_retries=0)
+    errors = []
+    monkeypatch.setattr(handle_result, "get_openai_client", fake_openai.client)
+    monkeypatch.setattr(handle_result, "get_openai_gateway", lambda: gateway)
+    monkeypatch.setattr(handle_result, "get_answer_cache", lambda: cache)
+    monkeypatch.setattr(handle_result, "get_embedder", lambda: LocalHashEmbedder(dimension=64))
+    monkeypatch.setattr(handle_result, "retrieve_chunks", lambda question, collections, top_k: (HITS, []))
+    monkeypatch.setattr(handle_result.st, "error", errors.append)
+    yield cache, gateway, errors
+    cache.close()
+
+
+def stream(question):
+    return handle_result.handle_result_stream(question, [0], DOCUMENTS)
+
+
+def test_stream_yields_pieces_in_order_and_caches_the_answer(fake_openai, answering):
+    cache, gateway, errors = answering
+
+    pieces = list(stream("What does the report cover?"))
+
+    assert pieces == ["Hello ", "from ", "the ", "fake ", "server. "]
+    assert errors == []
+    assert gateway.stats()['in_flight'] == 0
+    request = fake_openai.requests[0][1]
+    assert request['stream'] is True
+    assert "The report covers quarterly results." in request['messages'][0]['content']
+
+    # The complete answer is cached and served in one piece
+    assert list(stream("What does the report cover?")) == ["Hello from the fake server. "]
+    assert len(fake_openai.requests) == 1
+
+
+def test_abandoned_stream_closes_cleanly(fake_openai, answering):
+    cache, gateway, errors = answering
+    fake_openai.stream_delay = 0.05
+
+    pieces = stream("What does the report cover?")
+    assert next(pieces) == "Hello "
+    pieces.close()
+
+    assert gateway.stats()['in_flight'] == 0
+    assert errors == []
+    assert cache.stats()['entries'] == 0
+
+
+def test_stream_cut_by_the_server_is_reported_and_not_cached(fake_openai, answering):
+    cache, gateway, errors = answering
+    fake_openai.stream_cut_after = 2
+
+    pieces = list(stream("What does the report cover?"))
+
+    assert pieces == ["Hello ", "from "]
+    assert len(errors) == 1
+    assert gateway.stats()['in_flight'] == 0
+    assert cache.stats()['entries'] == 0
+
+
+def test_answer_from_partial_retrieval_is_not_cached(fake_openai, answering, monkeypatch):
+    cache, gateway, errors = answering
+    monkeypatch.setattr(handle_result, "retrieve_chunks", lambda question, collections, top_k: (HITS, ["test.doc_other"]))
+
+    assert list(stream("What does the report cover?"))
+    assert handle_result.handle_result("What does the report cover?", [0], DOCUMENTS)
+
+    assert cache.stats()['entries'] == 0
+    assert len(fake_openai.requests) == 2
+
+
+def test_cached_answers_are_not_reused_after_vector_settings_change(fake_openai, answering, monkeypatch):
+    cache, gateway, errors = answering
+    list(stream("What does the report cover?"))
+
+    monkeypatch.setenv("NOTEBOOK_VECTOR_PRECISION", "int8")
+    list(stream("What does the report cover?"))
+
+    assert len(fake_openai.requests) == 2
+    assert cache.stats()['entries'] == 2
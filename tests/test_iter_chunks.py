@@ -0,0 +1,72 @@
+import types
+import pytest
+from benchmarks._corpus import make_pages, normalized_document
+from utils.count_tokens import count_tokens
+from utils.iter_chunks import iter_chunks
+
+
+@pytest.fixture(scope="module")
+def document():
+    return normalized_document(make_pages(0.05))
+
+
+def test_is_a_generator(document):
+    assert isinstance(iter_chunks(document), types.GeneratorType)
+
+
+@pytest.mark.parametrize("max_tokens, overlap_tokens", [(200, 30), (50, 0), (20, 10)])
+def test_chunks_fit_the_budget_and_cover_the_text(document, max_tokens, overlap_tokens):
+    chunks = list(iter_chunks(document, max_tokens=max_tokens, overlap_tokens=overlap_tokens))
+
+    assert [chunk['index'] for chunk in chunks] == list(range(len(chunks)))
+    covered = bytearray(len(document))
+    for chunk in chunks:
+        assert chunk['text'] == document[chunk['start']:chunk['end']]
+        assert count_tokens(chunk['text']) <= max_tokens
+        covered[chunk['start']:chunk['end']] = b"\x01" * (chunk['end'] - chunk['start'])
+    # Only whitespace between sentences is left out
+    assert all(covered[i] or document[i].isspace() for i in range(len(document)))
+
+
+def test_chunks_end_on_sentence_boundaries(document):
+    for chunk in iter_chunks(document, max_tokens=100, overlap_tokens=0):
+        # Every sentence in the corpus is short, so none needs splitting
+        assert chunk['text'][-1] in ".!?"
+        assert document[chunk['end']:chunk['end'] + 1] in ("", "\n")
+        assert chunk['start'] == 0 or document[chunk['start'] - 1].isspace()
+
+
+def test_overlap_repeats_trailing_sentences(document):
+    chunks = list(iter_chunks(document, max_tokens=100, overlap_tokens=30))
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk['start'] > previous['start']
+        overlap = document[chunk['start']:previous['end']] if chunk['start'] < previous['end'] else ""
+        assert count_tokens(overlap) <= 30
+
+    no_overlap = list(iter_chunks(document, max_tokens=100, overlap_tokens=0))
+    assert all(chunk['start'] >= previous['end'] for previous, chunk in zip(no_overlap, no_overlap[1:]))
+    assert len(no_overlap) < len(chunks)
+
+
+def test_splits_oversized_sentences_on_words():
+    text = " ".join(f"word{i}" for i in range(300)) + "."
+    chunks = list(iter_chunks(text, max_tokens=40, overlap_tokens=0))
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk['text']) <= 40 for chunk in chunks)
+    assert " ".join(chunk['text'] for chunk in chunks) == text
+
+
+def test_records_pages():
+    pages = ["First page sentence one. First page sentence two.", "Second page sentence one. Second page ends."]
+    text = "".join(pages)
+    offsets = [0, len(pages[0])]
+
+    chunks = list(iter_chunks(text, max_tokens=8, overlap_tokens=0, page_offsets=offsets))
+
+    for chunk in chunks:
+        expected = 1 if chunk['end'] <= offsets[1] else 2
+        assert chunk['page_end'] == expected
+        assert chunk['page_start'] == (1 if chunk['start'] < offsets[1] else 2)
+    assert {chunk['page_start'] for chunk in chunks} == {1, 2}
+    assert all(chunk['page_start'] == 0 for chunk in iter_chunks(text, max_tokens=8))
@@ -0,0 +1,50 @@
+import random
+import pytest
+from utils.normalize_text import normalize_display_text
+from benchmarks._corpus import legacy_document, legacy_format_pdf_content, normalized_document
+
+
+def random_text(rng, length):
+    alphabet = "aZx 9 1. .!?\n\t  Ab"
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+@pytest.mark.parametrize("pages, expected", [
+    (["  Hello   world.  This is\tit. "], "Hello world.\n\nThis is it."),
+    (["Steps: 1. Open the file. 2. Read it. 3. Close it."],
+     "Steps: \n\n1.\n\nOpen the file. \n\n2.\n\nRead it. \n\n3.\n\nClose it."),
+    (["A. B. C. D"], "A.\n\nB. C.\n\nD"),
+    (["Dr. Smith went home!Then he slept? Yes."], "Dr.\n\nSmith went home!Then he slept?\n\nYes."),
+    (["Line one\nline two\n\n\nLine three."], "Line one line two Line three."),
+    (["Version 2.5 released. See section 3.  Details follow."],
+     "Version 2.5 released.\n\nSee section \n\n3.\n\nDetails follow."),
+    (["First page ends here.", "Second page starts.\n"], "First page ends here.Second page starts."),
+    (["", "   ", "Only text."], "Only text."),
+])
+def test_golden_pages(pages, expected):
+    assert legacy_document(pages) == expected
+    assert normalized_document(pages) == expected
+
+
+def test_matches_legacy_cleanup_on_random_pages():
+    rng = random.Random(6)
+    for _ in range(5000):
+        pages = [random_text(rng, rng.randint(0, 40)) for _ in range(rng.randint(1, 3))]
+        assert normalized_document(pages) == legacy_document(pages), pages
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("  one  \n\n\n  two\n \n three ", "one\ntwo\nthree"),
+    ("para one\n\npara two", "para one\npara two"),
+    ("\n\n\n", ""),
+])
+def test_golden_display_text(text, expected):
+    assert legacy_format_pdf_content(text) == expected
+    assert normalize_display_text(text) == expected
+
+
+def test_display_text_matches_legacy_on_random_text():
+    rng = random.Random(6)
+    for _ in range(5000):
+        text = random_text(rng, rng.randint(0, 40))
+        assert normalize_display_text(text) == legacy_format_pdf_content(text), text
@@ -0,0 +1,127 @@
+import threading
+import time
+import openai
+import pytest
+from utils.openai_gateway import OpenAIGateway, INTERACTIVE, BULK
+
+
+def ask(client, stream=False):
+    return lambda: client.chat.completions.create(
+        model="gpt-4", messages=[{'role': 'user', 'content': "Hi"}], stream=stream
+    )
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_retries_rate_limit_after_retry_after(fake_openai):
+    fake_openai.fail(429, "Rate limit reached", headers={'retry-after': "0.6"})
+    gateway = OpenAIGateway(max_retries=2)
+
+    response = gateway.call(ask(fake_openai.client()), tokens=10)
+
+    assert response.choices[0].message.content
+    assert len(fake_openai.requests) == 2
+    # Full-jitter backoff alone waits at most 0.5s before the first retry
+    assert fake_openai.requests[1][2] - fake_openai.requests[0][2] >= 0.6
+    assert gateway.stats()[INTERACTIVE]['retries'] == 1
+
+
+def test_gives_up_after_max_retries(fake_openai):
+    for _ in range(3):
+        fake_openai.fail(503, "Overloaded", headers={'retry-after': "0"})
+    gateway = OpenAIGateway(max_retries=2)
+
+    with pytest.raises(openai.InternalServerError):
+        gateway.call(ask(fake_openai.client()))
+
+    assert len(fake_openai.requests) == 3
+    assert gateway.stats()[INTERACTIVE]['failures'] == 1
+
+
+def test_does_not_retry_bad_request(fake_openai):
+    fake_openai.fail(400, "Bad request")
+    gateway = OpenAIGateway(max_retries=3)
+
+    with pytest.raises(openai.BadRequestError):
+        gateway.call(ask(fake_openai.client()))
+
+    assert len(fake_openai.requests) == 1
+    assert gateway.stats()[INTERACTIVE] == {'requests': 1, 'retries': 0, 'failures': 1, 'wait_seconds': pytest.approx(0, abs=0.1)}
+    assert gateway.stats()['in_flight'] == 0
+
+
+def test_abandoned_stream_releases_its_slot(fake_openai):
+    fake_openai.stream_delay = 0.05
+    gateway = OpenAIGateway(max_in_flight=1)
+
+    events = gateway.stream(ask(fake_openai.client(), stream=True))
+    assert next(events).choices[0].delta.content == "Hello "
+    assert gateway.stats()['in_flight'] == 1
+    events.close()
+    assert gateway.stats()['in_flight'] == 0
+
+    # The only slot is free again for the next request
+    chunks = [event.choices[0].delta.content or "" for event in gateway.stream(ask(fake_openai.client(), stream=True))]
+    assert "".join(chunks) == "Hello from the fake server. "
+
+
+def test_limits_requests_in_flight_at_the_server(fake_openai):
+    fake_openai.delay = 0.1
+    gateway = OpenAIGateway(max_in_flight=2)
+    client = fake_openai.client()
+
+    threads = [threading.Thread(target=gateway.call, args=(ask(client),)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fake_openai.requests) == 6
+    assert fake_openai.max_in_flight == 2
+
+
+def test_interactive_is_admitted_before_bulk_when_full():
+    gateway = OpenAIGateway(max_in_flight=4)
+    release = [threading.Event() for _ in range(4)]
+    admitted = []
+
+    def start(name, priority=INTERACTIVE, event=None):
+        def send():
+            admitted.append(name)
+            if event:
+                event.wait(timeout=5)
+        thread = threading.Thread(target=gateway.call, args=(send,), kwargs={'priority': priority}, daemon=True)
+        thread.start()
+        return thread
+
+    try:
+        # Fill every slot
+        holders = [start(f"holder{i}", event=release[i]) for i in range(4)]
+        wait_until(lambda: gateway.stats()['in_flight'] == 4)
+
+        # A bulk request queues first, an interactive one after it
+        bulk = start("bulk", BULK)
+        wait_until(lambda: gateway._waiting[BULK] == 1)
+        interactive = start("interactive")
+        wait_until(lambda: gateway._waiting[INTERACTIVE] == 1)
+
+        # The freed slot goes to the interactive request; bulk keeps waiting
+        release[0].set()
+        interactive.join(timeout=5)
+        assert admitted[-1] == "interactive"
+        time.sleep(0.05)
+        assert "bulk" not in admitted
+    finally:
+        for event in release:
+            event.set()
+
+    # Bulk runs once slots free up and no interactive request is waiting
+    for thread in holders + [bulk]:
+        thread.join(timeout=5)
+    assert admitted[-1] == "bulk"
+    assert gateway.stats()['in_flight'] == 0
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from utils.vector_store import NumpyCollection, PRECISIONS
+
+
+def vectors(count, dimension=16, seed=13):
+    return np.random.default_rng(seed).standard_normal((count, dimension)).astype(np.float32)
+
+
+@pytest.mark.parametrize("precision", sorted(PRECISIONS))
+def test_upsert_with_duplicate_ids_keeps_last(tmp_path, precision):
+    v = vectors(4)
+    collection = NumpyCollection(str(tmp_path), "docs", precision=precision)
+    collection.upsert(ids=["a", "b", "a", "c"], embeddings=v.tolist(), documents=["a1", "b", "a2", "c"],
+                      metadatas=[{'n': 0}, {'n': 1}, {'n': 2}, {'n': 3}])
+
+    assert collection.count() == 3
+    # The last vector given for "a" is the one stored
+    result = collection.query(query_embeddings=[v[2].tolist()], n_results=10)
+    assert result['ids'][0][0] == "a"
+    assert sorted(result['ids'][0]) == ["a", "b", "c"]
+    assert result['documents'][0][0] == "a2"
+    assert result['metadatas'][0][0] == {'n': 2}
+    collection.close()
+
+    reopened = NumpyCollection(str(tmp_path), "docs")
+    assert reopened.count() == 3
+    result = reopened.query(query_embeddings=[v[0].tolist()], n_results=10)
+    assert sorted(result['ids'][0]) == ["a", "b", "c"]
+    assert reopened.get(["a"])['documents'] == ["a2"]
+
+
+@pytest.mark.parametrize("precision", sorted(PRECISIONS))
+def test_upsert_replaces_across_batches_and_reopen(tmp_path, precision):
+    v = vectors(3)
+    collection = NumpyCollection(str(tmp_path), "docs", precision=precision, rerank=precision != "float32")
+    collection.upsert(ids=["a", "b"], embeddings=v[:2].tolist(), documents=["a1", "b"])
+    collection.upsert(ids=["a"], embeddings=v[2:].tolist(), documents=["a2"])
+    collection.close()
+
+    reopened = NumpyCollection(str(tmp_path), "docs")
+    result = reopened.query(query_embeddings=[v[2].tolist()], n_results=2)
+    assert result['ids'][0] == ["a", "b"]
+    assert result['documents'][0][0] == "a2"
+    assert result['distances'][0][0] == pytest.approx(0.0, abs=0.05)
@@ -0,0 +1,196 @@
+import time
+import hashlib
+import numpy as np
+from utils.get_setting import get_setting
+from utils.sqlite_store import SQLiteStore, EVICTION_HEADROOM, shared_instance
+
+# Defaults for the ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL_HOURS and
+# ANSWER_CACHE_MAX_ENTRIES settings
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_TTL_HOURS = 7 * 24
+DEFAULT_MAX_ENTRIES = 5000
+
+
+class AnswerCache(SQLiteStore):
+    """
+    Persistent cache of answers shared by all sessions.
+
+    Answers are grouped by document set, a key naming exactly which document
+    versions and answer settings produced them. Within a document set a
+    question is matched by the cosine similarity of its embedding to the
+    questions answered before, so rephrasings of a question already asked
+    are served without calling the chat model. Entries expire after a TTL
+    and the least recently used are evicted beyond `max_entries`.
+    """
+
+    SCHEMA = (
+        """
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY,
+                doc_set TEXT NOT NULL,
+                model TEXT NOT NULL,
+                question TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_answers_doc_set ON answers (doc_set, model)",
+        "CREATE INDEX IF NOT EXISTS idx_answers_last_access ON answers (last_access)"
+    )
+
+    def __init__(self, path="./notebook_cache/answers.sqlite3", threshold=DEFAULT_THRESHOLD,
+                 ttl_seconds=DEFAULT_TTL_HOURS * 3600, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Open the cache.
+
+        Args:
+            path (str): SQLite file to store answers in
+            threshold (float): Minimum cosine similarity for a cached question to match.
+                               Above 1 nothing ever matches
+            ttl_seconds (int): Seconds after which an answer is no longer served
+            max_entries (int): Maximum number of stored answers
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        super().__init__(path)
+
+    @staticmethod
+    def doc_set_key(collection_names, *settings):
+        """
+        Build the key of a document set.
+
+        Collection names already identify the namespace and the exact PDF
+        content, so a new version of a document gets a new key.
+
+        Args:
+            collection_names (list): Collections the answer is retrieved from
+            *settings: Anything else the answer depends on, such as the chat model
+
+        Returns:
+            str: Hex digest identifying the document set
+        """
+        parts = sorted(set(collection_names)) + [repr(setting) for setting in settings]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def lookup(self, doc_set, model, vector):
+        """
+        Find the answer to the most similar question asked about a document set.
+
+        Args:
+            doc_set (str): Key from doc_set_key
+            model (str): Model id of the embedder that produced `vector`
+            vector (list): Embedding of the question
+
+        Returns:
+            str or None: Cached answer, or None if no question is similar enough
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        now = time.time()
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, vector, answer FROM answers WHERE doc_set = ? AND model = ? AND created >= ?",
+                (doc_set, model, now - self.ttl_seconds)
+            ).fetchall()
+
+            best = None
+            if rows:
+                matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob, _ in rows])
+                similarities = matrix @ query / np.maximum(np.linalg.norm(matrix, axis=1), 1e-12)
+                index = int(np.argmax(similarities))
+                if similarities[index] >= self.threshold:
+                    best = rows[index]
+
+            if best is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE answers SET last_access = ?, hits = hits + 1 WHERE id = ?", (now, best[0])
+            )
+            self._conn.commit()
+            return best[2]
+
+    def put(self, doc_set, model, question, vector, answer):
+        """
+        Store an answer and evict expired or excess entries.
+
+        Args:
+            doc_set (str): Key from doc_set_key
+            model (str): Model id of the embedder that produced `vector`
+            question (str): The question asked
+            vector (list): Embedding of the question
+            answer (str): The complete answer
+        """
+        now = time.time()
+        blob = np.asarray(vector, dtype=np.float32).tobytes()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO answers (doc_set, model, question, vector, answer, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (doc_set, model, question, blob, answer, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """Drop expired answers, then the least recently used beyond max_entries."""
+        expired = self._conn.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl_seconds,)).rowcount
+        excess = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0] - self.max_entries
+        evicted = 0
+        if excess > 0:
+            evicted = self._conn.execute(
+                "DELETE FROM answers WHERE id IN (SELECT id FROM answers ORDER BY last_access LIMIT ?)",
+                (excess + int(self.max_entries * EVICTION_HEADROOM),)
+            ).rowcount
+        if expired or evicted:
+            print(f"🧹 Evicted {expired + evicted} cached answers")
+
+    def stats(self):
+        """
+        Get cache counters and size.
+
+        Returns:
+            dict: Hits and misses of this process, hit rate, stored entries, and
+                  hits served by the stored entries across all processes
+        """
+        with self._lock:
+            entries, stored_hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM answers"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': entries,
+                'stored_hits': stored_hits
+            }
+
+_shared_cache = shared_instance(lambda: AnswerCache(
+    threshold=float(get_setting("ANSWER_CACHE_THRESHOLD", DEFAULT_THRESHOLD)),
+    ttl_seconds=int(float(get_setting("ANSWER_CACHE_TTL_HOURS", DEFAULT_TTL_HOURS)) * 3600),
+    max_entries=int(get_setting("ANSWER_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+), "Answer cache")
+
+
+def get_answer_cache():
+    """
+    Get the process-wide answer cache, creating it on first use.
+
+    The threshold, TTL and size come from the ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_TTL_HOURS and ANSWER_CACHE_MAX_ENTRIES settings.
+
+    Returns:
+        AnswerCache or None: Shared cache or None if it cannot be opened
+    """
+    return _shared_cache()
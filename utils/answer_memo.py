@@ -0,0 +1,64 @@
+from collections import OrderedDict
+import streamlit as st
+from utils.handle_result import CANDIDATE_CHUNKS, get_answer_settings
+
+# Answers kept per session; the least recently shown is dropped first
+MAX_MEMOIZED_ANSWERS = 32
+
+
+def get_answer_memo_key(question, selected_docs, n_results=CANDIDATE_CHUNKS):
+    """
+    Build the key identifying an answer.
+
+    Two keys are equal only if the same question would retrieve from the same
+    document versions with the same settings, so a stored answer can be shown
+    again instead of being generated again.
+
+    Args:
+        question (str): The question asked
+        selected_docs (list): Selected document dictionaries
+        n_results (int): Number of candidate chunks retrieved across the selected documents
+
+    Returns:
+        tuple: Hashable memo key
+    """
+    documents = tuple(sorted(
+        # A document still being indexed gives different answers once it is done
+        (doc.get('collection'), doc.get('doc_id'), doc.get('status'))
+        for doc in selected_docs
+    ))
+    return (" ".join(question.split()), documents, get_answer_settings(n_results))
+
+
+def get_memoized_answer(key):
+    """
+    Look up an answer stored for this session.
+
+    Args:
+        key (tuple): Key from get_answer_memo_key
+
+    Returns:
+        str or None: The stored answer, or None if there is none
+    """
+    memo = st.session_state.get('answer_memo')
+    if not memo or key not in memo:
+        return None
+    memo.move_to_end(key)
+    return memo[key]
+
+
+def memoize_answer(key, answer):
+    """
+    Store an answer for this session so reruns can show it again.
+
+    Args:
+        key (tuple): Key from get_answer_memo_key
+        answer (str): The complete answer. Empty answers are not stored
+    """
+    if not answer:
+        return
+    memo = st.session_state.setdefault('answer_memo', OrderedDict())
+    memo[key] = answer
+    memo.move_to_end(key)
+    while len(memo) > MAX_MEMOIZED_ANSWERS:
+        memo.popitem(last=False)
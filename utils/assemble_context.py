@@ -0,0 +1,138 @@
+import re
+from utils.count_tokens import count_tokens
+
+_WORD = re.compile(r'\w+')
+
+# Chunks sharing at least this fraction of their word trigrams with an already
+# chosen chunk are treated as duplicates and never added
+DUPLICATE_SIMILARITY = 0.8
+
+
+def assemble_context(hits, sources, max_tokens=800, diversity=0.3):
+    """
+    Pack the most useful retrieved chunks into a token budget.
+
+    Chunks are chosen greedily by maximal marginal relevance: each step takes
+    the chunk whose relevance, minus `diversity` times its overlap in word
+    trigrams with the chunks already chosen, is highest. Identical and
+    near-duplicate chunks are skipped. A chunk that no longer fits the budget
+    is skipped, but smaller ones may still be added. Chosen chunks that
+    overlap, or follow each other with only whitespace between them, in the
+    same document are then merged into one contiguous passage.
+
+    Args:
+        hits (list): Hits from retrieve_chunks, best first
+        sources (dict): Document name by collection name
+        max_tokens (int): Token budget for all passages, including their headers
+        diversity (float): Weight of redundancy against relevance, from 0 to 1
+
+    Returns:
+        list: Passage texts with a source header, most relevant first
+    """
+    candidates = []
+    seen_texts = set()
+    for hit in hits:
+        text = hit['document']
+        if not text or text in seen_texts:
+            continue
+        seen_texts.add(text)
+        candidates.append({
+            'hit': hit,
+            # Distances are 2 - 2 * cosine similarity for normalized vectors
+            'relevance': 1.0 - hit['distance'] / 2.0,
+            'shingles': _shingles(text),
+            'tokens': count_tokens(text)
+        })
+
+    chosen = []
+    used_tokens = 0
+    while candidates:
+        best = max(candidates, key=lambda candidate: _marginal_relevance(candidate, chosen, diversity))
+        candidates.remove(best)
+        if chosen and max(_overlap(best, other) for other in chosen) >= DUPLICATE_SIMILARITY:
+            continue
+        header_tokens = count_tokens(_header(best['hit'], sources))
+        if used_tokens + header_tokens + best['tokens'] > max_tokens:
+            continue
+        chosen.append(best)
+        used_tokens += header_tokens + best['tokens']
+
+    return [
+        f"{_header(passage['hit'], sources)}\n{passage['text']}"
+        for passage in _merge_adjacent(chosen)
+    ]
+
+
+def _marginal_relevance(candidate, chosen, diversity):
+    """Relevance of a candidate, penalized by its overlap with the chosen chunks."""
+    redundancy = max((_overlap(candidate, other) for other in chosen), default=0.0)
+    return (1.0 - diversity) * candidate['relevance'] - diversity * redundancy
+
+
+def _shingles(text):
+    """Set of the word trigrams of a text."""
+    words = _WORD.findall(text.lower())
+    return {tuple(words[i:i + 3]) for i in range(max(len(words) - 2, 1))}
+
+
+def _overlap(first, second):
+    """Jaccard similarity of the word trigrams of two candidates."""
+    if not first['shingles'] or not second['shingles']:
+        return 0.0
+    return len(first['shingles'] & second['shingles']) / len(first['shingles'] | second['shingles'])
+
+
+def _header(hit, sources):
+    """Source line shown above a passage."""
+    return f"[Source: {sources[hit['collection']]}]"
+
+
+def _merge_adjacent(chosen):
+    """
+    Join chosen chunks whose character spans overlap or are consecutive in the same document.
+
+    Consecutive chunks are separated only by the whitespace between two
+    sentences or paragraphs, which is not stored; it is restored as a space
+    for a one-character gap and as a paragraph break otherwise. Passages are
+    ordered by the relevance of their best chunk.
+    """
+    by_document = {}
+    for candidate in chosen:
+        by_document.setdefault(candidate['hit']['collection'], []).append(candidate)
+
+    passages = []
+    for candidates in by_document.values():
+        candidates.sort(key=lambda candidate: candidate['hit']['metadata'].get('start', -1))
+        passage = None
+        for candidate in candidates:
+            metadata = candidate['hit']['metadata']
+            start, end = metadata.get('start'), metadata.get('end')
+            index = metadata.get('chunk_index')
+            text = candidate['hit']['document']
+            joint = _joint(passage, start, index)
+            if joint is not None:
+                passage['text'] += joint + text[max(passage['end'] - start, 0):]
+                passage['end'] = max(passage['end'], end)
+                passage['index'] = index
+                passage['relevance'] = max(passage['relevance'], candidate['relevance'])
+                continue
+            passage = {'hit': candidate['hit'], 'text': text, 'end': end, 'index': index,
+                       'relevance': candidate['relevance']}
+            passages.append(passage)
+
+    return sorted(passages, key=lambda passage: passage['relevance'], reverse=True)
+
+
+def _joint(passage, start, index):
+    """
+    Text joining a chunk to the end of a passage, or None if they are not contiguous.
+
+    Overlapping chunks need no joint; only their new part is appended.
+    """
+    if not passage or start is None or passage['end'] is None:
+        return None
+    if start <= passage['end']:
+        return ""
+    if index is None or passage['index'] is None or index != passage['index'] + 1:
+        return None
+    return " " if start - passage['end'] == 1 else "\n\n"
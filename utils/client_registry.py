@@ -0,0 +1,145 @@
+import os
+import atexit
+import threading
+import httpx
+import chromadb
+from openai import OpenAI
+
+try:
+    from chromadb.errors import NotFoundError
+except ImportError:
+    # Older ChromaDB versions raise ValueError for a missing collection
+    NotFoundError = ValueError
+
+# One shared client per store path / API key for the whole process. Streamlit
+# reruns re-execute main.py but not these modules, so every session reuses them.
+_lock = threading.RLock()
+_chroma_clients = {}
+_collections = {}
+_openai_clients = {}
+
+
+def get_chroma_client(persist_directory="./chrome_store"):
+    """
+    Get the shared ChromaDB client for a store path, creating it on first use.
+
+    Args:
+        persist_directory (str): Directory to persist ChromaDB data
+
+    Returns:
+        Client: ChromaDB client (in-memory if persistent storage fails)
+    """
+    key = os.path.abspath(persist_directory)
+    with _lock:
+        client = _chroma_clients.get(key)
+        if client is not None:
+            return client
+
+        # Try to create the directory if it doesn't exist
+        try:
+            os.makedirs(persist_directory, exist_ok=True)
+        except:
+            pass
+
+        # Use more compatible ChromaDB configuration
+        try:
+            client = chromadb.PersistentClient(path=persist_directory)
+        except Exception as e:
+            # Fallback to in-memory client if persistent storage fails
+            print(f"Warning: Persistent storage failed, using in-memory client: {e}")
+            client = chromadb.Client()
+
+        _chroma_clients[key] = client
+        return client
+
+
+def get_collection_handle(collection_name, persist_directory="./chrome_store", metadata=None, create=True):
+    """
+    Get a cached handle to a ChromaDB collection, creating the collection if needed.
+
+    Args:
+        collection_name (str): Name of the collection
+        persist_directory (str): Directory to persist ChromaDB data
+        metadata (dict, optional): Metadata recorded if the collection is created
+        create (bool): Create the collection if it does not exist
+
+    Returns:
+        Collection or None: ChromaDB collection, or None if it does not exist and
+                            create is False
+    """
+    key = (os.path.abspath(persist_directory), collection_name)
+    with _lock:
+        collection = _collections.get(key)
+        if collection is None:
+            client = get_chroma_client(persist_directory)
+            if create:
+                collection = client.get_or_create_collection(name=collection_name, metadata=metadata)
+            else:
+                try:
+                    collection = client.get_collection(name=collection_name)
+                except (ValueError, NotFoundError):
+                    return None
+            _collections[key] = collection
+        return collection
+
+
+def forget_collections(collection_name=None, persist_directory="./chrome_store"):
+    """
+    Drop cached collection handles after their collections were deleted.
+
+    Args:
+        collection_name (str, optional): Collection to forget. If None, forgets
+                                         every collection of the store.
+        persist_directory (str): Directory the collections live in
+    """
+    path = os.path.abspath(persist_directory)
+    with _lock:
+        for key in list(_collections):
+            if key[0] == path and (collection_name is None or key[1] == collection_name):
+                del _collections[key]
+
+
+def get_pooled_openai_client(api_key, max_connections=20):
+    """
+    Get the shared OpenAI client for an API key.
+
+    Each client owns one pooled HTTP client, so keep-alive connections and TLS
+    sessions are reused by every embedding and chat request in the process.
+
+    Args:
+        api_key (str): OpenAI API key
+        max_connections (int): Maximum number of pooled connections
+
+    Returns:
+        OpenAI: OpenAI client instance
+    """
+    with _lock:
+        client = _openai_clients.get(api_key)
+        if client is None:
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections
+                ),
+                timeout=httpx.Timeout(60.0, connect=10.0)
+            )
+            # Retries are left to the OpenAI gateway, which paces them against the rate budgets
+            client = OpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+            _openai_clients[api_key] = client
+        return client
+
+
+def close_clients():
+    """Close pooled HTTP connections and release all cached clients."""
+    with _lock:
+        for client in _openai_clients.values():
+            try:
+                client.close()
+            except Exception as e:
+                print(f"Warning: Error closing OpenAI client: {e}")
+        _openai_clients.clear()
+        _collections.clear()
+        _chroma_clients.clear()
+
+
+atexit.register(close_clients)
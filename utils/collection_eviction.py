@@ -0,0 +1,173 @@
+import time
+from utils.vector_store import get_vector_store
+from utils.ingest_checkpoint import get_ingest_checkpoint
+from utils.get_setting import get_setting
+from utils.sqlite_store import SQLiteStore, shared_instance
+
+# Defaults for the COLLECTION_BUDGET_MB and COLLECTION_IDLE_HOURS settings
+DEFAULT_BUDGET_MB = 2048
+DEFAULT_IDLE_HOURS = 72
+
+# Eviction runs at most this often unless forced
+ENFORCE_INTERVAL_SECONDS = 60
+
+# A collection's last use is written at most this often
+TOUCH_INTERVAL_SECONDS = 60
+
+# Collections used this recently are never evicted to meet the budget,
+# so a document is not dropped right after it was indexed or queried
+MIN_RESIDENCY_SECONDS = 300
+
+
+class CollectionEvictionManager(SQLiteStore):
+    """
+    Keeps the vector store within a size budget.
+
+    Every collection's size and last use (ingest, query, or a session still
+    showing the document) is tracked in SQLite. enforce() deletes collections
+    idle for longer than the idle TTL, then the least recently used ones until
+    the total fits the budget, sparing those used within MIN_RESIDENCY_SECONDS.
+    An evicted document is simply indexed again if it is uploaded again; its
+    extracted text stays in the document store.
+    """
+
+    SCHEMA = (
+        """
+            CREATE TABLE IF NOT EXISTS collections (
+                name TEXT PRIMARY KEY,
+                size_bytes INTEGER NOT NULL DEFAULT 0,
+                last_used REAL NOT NULL
+            )
+        """,
+    )
+
+    def __init__(self, path="./notebook_cache/collections.sqlite3", budget_bytes=DEFAULT_BUDGET_MB * 1024 * 1024,
+                 idle_seconds=DEFAULT_IDLE_HOURS * 3600):
+        """
+        Open the usage records.
+
+        Args:
+            path (str): SQLite file to track collections in
+            budget_bytes (int): Maximum total size of all tracked collections
+            idle_seconds (int): Seconds without use after which a collection is deleted
+        """
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self._last_enforce = 0.0
+        self._last_touch = {}
+        super().__init__(path)
+
+    def touch(self, collection_name, size_bytes=None):
+        """
+        Record that a collection was used, and optionally its new size.
+
+        Args:
+            collection_name (str): Collection name
+            size_bytes (int, optional): Current size. Always written when given;
+                                        plain touches are throttled
+        """
+        now = time.time()
+        with self._lock:
+            if size_bytes is None and now - self._last_touch.get(collection_name, 0) < TOUCH_INTERVAL_SECONDS:
+                return
+            self._last_touch[collection_name] = now
+            if size_bytes is None:
+                self._conn.execute(
+                    "INSERT INTO collections (name, last_used) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET last_used = excluded.last_used",
+                    (collection_name, now)
+                )
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO collections (name, size_bytes, last_used) VALUES (?, ?, ?)",
+                    (collection_name, size_bytes, now)
+                )
+            self._conn.commit()
+
+    def forget(self, collection_name=None):
+        """
+        Stop tracking collections that were deleted.
+
+        Args:
+            collection_name (str, optional): Collection to forget. If None, forgets all
+        """
+        with self._lock:
+            if collection_name is None:
+                self._conn.execute("DELETE FROM collections")
+                self._last_touch.clear()
+            else:
+                self._conn.execute("DELETE FROM collections WHERE name = ?", (collection_name,))
+                self._last_touch.pop(collection_name, None)
+            self._conn.commit()
+
+    def enforce(self, force=False):
+        """
+        Delete idle collections, then least recently used ones until the budget is met.
+
+        Args:
+            force (bool): Run even if the last run was within ENFORCE_INTERVAL_SECONDS
+
+        Returns:
+            list: Names of the evicted collections
+        """
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_enforce < ENFORCE_INTERVAL_SECONDS:
+                return []
+            self._last_enforce = now
+            rows = self._conn.execute(
+                "SELECT name, size_bytes, last_used FROM collections ORDER BY last_used"
+            ).fetchall()
+
+        evicted = [name for name, _, last_used in rows if now - last_used > self.idle_seconds]
+        total = sum(size for name, size, _ in rows if name not in evicted)
+        for name, size, last_used in rows:
+            if total <= self.budget_bytes or now - last_used < MIN_RESIDENCY_SECONDS:
+                break
+            if name not in evicted:
+                evicted.append(name)
+                total -= size
+
+        store = get_vector_store()
+        for name in evicted:
+            try:
+                store.delete_collection(name)
+            except Exception as e:
+                print(f"Error evicting collection '{name}': {str(e)}")
+                continue
+            get_ingest_checkpoint().forget(name)
+            self.forget(name)
+            print(f"🗑️ Evicted collection '{name}'")
+        return evicted
+
+    def stats(self):
+        """
+        Describe the tracked collections.
+
+        Returns:
+            dict: 'collections', 'size_bytes' and 'budget_bytes'
+        """
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM collections"
+            ).fetchone()
+        return {'collections': count, 'size_bytes': size, 'budget_bytes': self.budget_bytes}
+
+
+_shared_manager = shared_instance(lambda: CollectionEvictionManager(
+    budget_bytes=int(float(get_setting("COLLECTION_BUDGET_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024),
+    idle_seconds=int(float(get_setting("COLLECTION_IDLE_HOURS", DEFAULT_IDLE_HOURS)) * 3600)
+))
+
+
+def get_collection_eviction_manager():
+    """
+    Get the process-wide eviction manager, creating it on first use.
+
+    The budget and idle time come from the COLLECTION_BUDGET_MB and
+    COLLECTION_IDLE_HOURS settings.
+
+    Returns:
+        CollectionEvictionManager: Shared eviction manager
+    """
+    return _shared_manager()
@@ -0,0 +1,30 @@
+import math
+
+try:
+    # Exact counts when tiktoken is installed and its encoding can be loaded
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+
+def count_tokens(text):
+    """
+    Count the tokens in a piece of text.
+
+    Uses the cl100k_base tokenizer when tiktoken is available. Otherwise the
+    count is estimated as one token per three UTF-8 bytes, which errs high for
+    English prose (about four characters per token) so budgets are not
+    overrun by digits, code or non-Latin scripts, which tokenize more densely.
+
+    Args:
+        text (str): Text to count
+
+    Returns:
+        int: Number of tokens
+    """
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text.encode('utf-8')) / 3)
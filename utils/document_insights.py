@@ -0,0 +1,208 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.iter_chunks import iter_chunks
+from utils.count_tokens import count_tokens
+from utils.get_content_hash import get_content_hash
+from utils.get_api_client import get_openai_client
+from utils.openai_gateway import get_openai_gateway, BULK
+from utils.sqlite_store import SQLiteStore, shared_instance
+
+SUMMARY_MODEL = "gpt-4"
+
+# Token budget for one section (map step) or one group of notes (reduce step),
+# leaving room for the prompt and the answer in the model's context window
+SECTION_TOKENS = 3000
+
+# Final prompts, one per quick-question button
+INSIGHT_PROMPTS = {
+    'summary': "Provide a brief summary of this document.",
+    'key_points': "What are the main key points in this document?",
+    'details': "What are the most important details I should know?"
+}
+
+
+class InsightStore(SQLiteStore):
+    """
+    Persistent store of precomputed document insights.
+
+    Entries are keyed by the document's content hash, so a new version of a
+    document gets new insights and unchanged documents are never recomputed.
+    """
+
+    SCHEMA = (
+        """
+            CREATE TABLE IF NOT EXISTS insights (
+                content_hash TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                summary TEXT,
+                key_points TEXT,
+                details TEXT,
+                updated REAL NOT NULL
+            )
+        """,
+    )
+
+    def __init__(self, path="./notebook_cache/insights.sqlite3"):
+        """
+        Open the insight store.
+
+        Args:
+            path (str): SQLite file to store insights in
+        """
+        super().__init__(path)
+
+    def get(self, content_hash):
+        """
+        Get the insights stored for a document version.
+
+        Args:
+            content_hash (str): Hash of the document content
+
+        Returns:
+            dict or None: 'status' plus one entry per INSIGHT_PROMPTS key, or None if unknown
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, summary, key_points, details FROM insights WHERE content_hash = ?",
+                (content_hash,)
+            ).fetchone()
+        if not row:
+            return None
+        return {'status': row[0], 'summary': row[1], 'key_points': row[2], 'details': row[3]}
+
+    def put(self, content_hash, status, insights=None):
+        """
+        Store the status and, when ready, the insights of a document version.
+
+        Args:
+            content_hash (str): Hash of the document content
+            status (str): 'pending', 'ready' or 'failed'
+            insights (dict, optional): Text for each INSIGHT_PROMPTS key
+        """
+        insights = insights or {}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO insights (content_hash, status, summary, key_points, details, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (content_hash, status, insights.get('summary'), insights.get('key_points'), insights.get('details'), time.time())
+            )
+            self._conn.commit()
+
+
+_get_store = shared_instance(InsightStore)
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="insights")
+_in_flight = set()
+_lock = threading.Lock()
+
+
+def get_document_insights(content_hash):
+    """
+    Get precomputed insights for a document version if they are ready.
+
+    Args:
+        content_hash (str): Hash of the document content
+
+    Returns:
+        dict or None: Text for each INSIGHT_PROMPTS key, or None if not ready
+    """
+    try:
+        insights = _get_store().get(content_hash)
+        if insights and insights['status'] == 'ready':
+            return insights
+    except Exception as e:
+        print(f"Error reading document insights: {str(e)}")
+    return None
+
+
+def schedule_document_insights(content):
+    """
+    Compute a document's summary, key points and details in the background.
+
+    Nothing is scheduled if the insights for this content already exist or
+    are being computed.
+
+    Args:
+        content (str): Extracted document text
+
+    Returns:
+        str or None: Content hash the insights are stored under, or None if error
+    """
+    try:
+        content_hash = get_content_hash(content)
+        store = _get_store()
+        existing = store.get(content_hash)
+
+        with _lock:
+            if content_hash in _in_flight or (existing and existing['status'] == 'ready'):
+                return content_hash
+            _in_flight.add(content_hash)
+
+        # Resolve the client once for every summary of the document. This runs on
+        # ingestion worker threads, where the st.error of a failed lookup is not shown
+        client = get_openai_client()
+        if not client:
+            print("Skipping document insights - no OpenAI client")
+            with _lock:
+                _in_flight.discard(content_hash)
+            return None
+
+        store.put(content_hash, 'pending')
+        _executor.submit(_compute_insights, content, content_hash, client)
+        return content_hash
+    except Exception as e:
+        print(f"Error scheduling document insights: {str(e)}")
+        return None
+
+
+def _compute_insights(content, content_hash, client):
+    """Run map-reduce summarization for one document and store the result."""
+    store = _get_store()
+    try:
+        # Map: condense each section of the document into notes. Short
+        # documents fit in one prompt as they are
+        if count_tokens(content) <= SECTION_TOKENS:
+            notes = [content]
+        else:
+            sections = [chunk['text'] for chunk in iter_chunks(content, max_tokens=SECTION_TOKENS, overlap_tokens=0)]
+            notes = _map_sections(client, sections)
+
+        # Reduce: merge notes until they fit in a single prompt
+        while len(notes) > 1 and count_tokens("\n\n".join(notes)) > SECTION_TOKENS:
+            groups = [chunk['text'] for chunk in iter_chunks("\n\n".join(notes), max_tokens=SECTION_TOKENS, overlap_tokens=0)]
+            if len(groups) >= len(notes):
+                break
+            notes = _map_sections(client, groups)
+
+        combined_notes = "\n\n".join(notes)
+        insights = {
+            key: _complete(client, f"You are a helpful and high level document assistant. Given the following notes covering a whole document: {combined_notes} and the question: {question}, provide a comprehensive and helpful answer. Keep a human touch in your response.")
+            for key, question in INSIGHT_PROMPTS.items()
+        }
+        store.put(content_hash, 'ready', insights)
+        print(f"📝 Precomputed insights for document {content_hash[:12]}")
+    except Exception as e:
+        print(f"Error computing document insights: {str(e)}")
+        store.put(content_hash, 'failed')
+    finally:
+        with _lock:
+            _in_flight.discard(content_hash)
+
+
+def _map_sections(client, sections):
+    """Condense each section into notes, a few sections at a time."""
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        return list(executor.map(
+            lambda section: _complete(client, f"Condense the following part of a document into concise notes that keep its main points and important details:\n\n{section}"),
+            sections
+        ))
+
+
+def _complete(client, prompt):
+    """Send a single-message chat completion and return its text."""
+    # Precomputed insights are background work; questions asked meanwhile go first
+    response = get_openai_gateway().call(
+        lambda: client.chat.completions.create(model=SUMMARY_MODEL, messages=[{"role": "user", "content": prompt}]),
+        tokens=count_tokens(prompt) + SECTION_TOKENS,
+        priority=BULK
+    )
+    return response.choices[0].message.content
@@ -0,0 +1,74 @@
+from utils.get_content_hash import get_content_hash
+
+
+class DocumentRecord:
+    """
+    Facts about an ingested document, computed once by its ingestion job.
+
+    The UI reads these on every rerun instead of re-parsing the PDF or
+    re-scanning its text.
+
+    Attributes:
+        page_count (int): Number of PDF pages
+        word_count (int): Number of words in the extracted text
+        size (int): Size of the uploaded file in bytes
+        content_hash (str or None): SHA-256 of the extracted text, None if extraction failed
+        chunk_count (int): Number of chunks stored in the vector store
+        page_offsets (tuple): Character offset where each page starts in the text
+    """
+
+    __slots__ = ('page_count', 'word_count', 'size', 'content_hash', 'chunk_count', 'page_offsets')
+
+    def __init__(self, page_count, word_count, size, content_hash, chunk_count=0, page_offsets=()):
+        self.page_count = page_count
+        self.word_count = word_count
+        self.size = size
+        self.content_hash = content_hash
+        self.chunk_count = chunk_count
+        self.page_offsets = page_offsets
+
+    def as_dict(self):
+        """
+        Convert the record to a JSON-serializable dictionary.
+
+        Returns:
+            dict: Attribute values by name
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild a record saved with as_dict.
+
+        Args:
+            data (dict): Attribute values by name
+
+        Returns:
+            DocumentRecord: The record
+        """
+        data = dict(data)
+        data['page_offsets'] = tuple(data.get('page_offsets') or ())
+        return cls(**data)
+
+
+def build_document_record(content, page_count, size, page_offsets=()):
+    """
+    Build the record of a document from its extracted text.
+
+    Args:
+        content (str or None): Extracted text, or None if extraction failed
+        page_count (int): Number of PDF pages
+        size (int): Size of the uploaded file in bytes
+        page_offsets (list): Character offset where each page starts in content
+
+    Returns:
+        DocumentRecord: Record with no chunks counted yet
+    """
+    return DocumentRecord(
+        page_count=page_count,
+        word_count=len(content.split()) if content else 0,
+        size=size,
+        content_hash=get_content_hash(content) if content else None,
+        page_offsets=tuple(page_offsets)
+    )
@@ -0,0 +1,280 @@
+import os
+import json
+import mmap
+import time
+import zlib
+import shutil
+import hashlib
+import threading
+from utils.document_record import DocumentRecord
+
+# Documents not touched by any session for this long are deleted
+DOCUMENT_TTL_SECONDS = 24 * 3600
+
+# Garbage collection runs at most this often
+GC_INTERVAL_SECONDS = 600
+
+# Sessions refresh a document's last access at most this often
+TOUCH_INTERVAL_SECONDS = 60
+
+
+class DocumentStore:
+    """
+    Content-addressed disk store for uploaded PDFs and their extracted text.
+
+    Each document lives in <root>/<id[:2]>/<id>/, where the id is the SHA-256
+    of the PDF bytes:
+        original.pdf  the uploaded file
+        pages.bin     zlib-compressed page texts, back to back
+        pages.json    [offset, length] of each compressed page in pages.bin
+        record.json   DocumentRecord of an extracted document
+
+    The id makes the store a cross-session dedup index: a PDF seen before, by
+    any session and under any filename, maps straight to its text and record,
+    and its vector collection is named after the same id. Sessions keep only
+    the id. Pages are decompressed one at a time on read and the PDF is
+    memory-mapped, so nothing is held in memory between reruns. The
+    directory's modification time is its last access; collect_garbage removes
+    documents no session has touched within the TTL.
+    """
+
+    def __init__(self, root="./notebook_cache/documents", ttl_seconds=DOCUMENT_TTL_SECONDS):
+        """
+        Args:
+            root (str): Directory to store documents in
+            ttl_seconds (int): Seconds after the last access before a document is deleted
+        """
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._last_gc = 0.0
+        self._last_touch = {}
+        os.makedirs(root, exist_ok=True)
+
+    def put_pdf(self, data):
+        """
+        Store the bytes of an uploaded PDF.
+
+        Args:
+            data (bytes): Raw PDF content
+
+        Returns:
+            str: Document id
+        """
+        doc_id = hashlib.sha256(data).hexdigest()
+        directory = self._directory(doc_id)
+        path = os.path.join(directory, "original.pdf")
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            self._write_atomic(path, data)
+        self.touch(doc_id, force=True)
+        return doc_id
+
+    def put_pages(self, doc_id, page_texts):
+        """
+        Store the extracted text of a document, compressed page by page.
+
+        Args:
+            doc_id (str): Document id from put_pdf
+            page_texts (list): Text of each page
+        """
+        directory = self._directory(doc_id)
+        if os.path.exists(os.path.join(directory, "pages.json")):
+            return
+
+        index = []
+        blobs = []
+        offset = 0
+        for text in page_texts:
+            blob = zlib.compress(text.encode("utf-8"))
+            index.append([offset, len(blob)])
+            blobs.append(blob)
+            offset += len(blob)
+
+        os.makedirs(directory, exist_ok=True)
+        self._write_atomic(os.path.join(directory, "pages.bin"), b"".join(blobs))
+        # The index is written last, so a document only has text once it is complete
+        self._write_atomic(os.path.join(directory, "pages.json"), json.dumps(index).encode("utf-8"))
+
+    def put_record(self, doc_id, record):
+        """
+        Save the record of an extracted document.
+
+        Args:
+            doc_id (str): Document id
+            record (DocumentRecord): Facts about the document
+        """
+        data = {'record': record.as_dict()}
+        self._write_atomic(os.path.join(self._directory(doc_id), "record.json"), json.dumps(data).encode("utf-8"))
+
+    def get_record(self, doc_id):
+        """
+        Look up a previously extracted document.
+
+        Whether its chunks are all stored is up to the ingest checkpoint.
+
+        Args:
+            doc_id (str): Document id
+
+        Returns:
+            DocumentRecord or None: The record, or None if the document was never extracted
+        """
+        try:
+            with open(os.path.join(self._directory(doc_id), "record.json"), "rb") as f:
+                data = json.loads(f.read())
+            return DocumentRecord.from_dict(data['record'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def page_count(self, doc_id):
+        """
+        Get the number of stored pages of a document.
+
+        Args:
+            doc_id (str): Document id
+
+        Returns:
+            int: Number of pages, 0 if no text is stored
+        """
+        return len(self._page_index(doc_id))
+
+    def read_page(self, doc_id, page):
+        """
+        Read the text of one page.
+
+        Args:
+            doc_id (str): Document id
+            page (int): 0-based page number
+
+        Returns:
+            str: Page text, empty if the page or document is missing
+        """
+        index = self._page_index(doc_id)
+        if not 0 <= page < len(index):
+            return ""
+        offset, length = index[page]
+        with open(os.path.join(self._directory(doc_id), "pages.bin"), "rb") as f:
+            f.seek(offset)
+            return zlib.decompress(f.read(length)).decode("utf-8")
+
+    def read_text(self, doc_id):
+        """
+        Read the full extracted text of a document.
+
+        Args:
+            doc_id (str): Document id
+
+        Returns:
+            str: Text of all pages joined, empty if no text is stored
+        """
+        return "".join(self.read_page(doc_id, page) for page in range(self.page_count(doc_id)))
+
+    def open_pdf(self, doc_id):
+        """
+        Map the stored PDF into memory without reading it.
+
+        Args:
+            doc_id (str): Document id
+
+        Returns:
+            mmap.mmap or None: Read-only map of the PDF bytes, None if missing.
+                               Close it when done.
+        """
+        path = os.path.join(self._directory(doc_id), "original.pdf")
+        try:
+            with open(path, "rb") as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+    def touch(self, doc_id, force=False):
+        """
+        Mark a document as still in use, so garbage collection keeps it.
+
+        Args:
+            doc_id (str): Document id
+            force (bool): Touch even if it was touched within TOUCH_INTERVAL_SECONDS
+        """
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_touch.get(doc_id, 0) < TOUCH_INTERVAL_SECONDS:
+                return
+            self._last_touch[doc_id] = now
+        try:
+            os.utime(self._directory(doc_id), (now, now))
+        except OSError:
+            pass
+
+    def collect_garbage(self, force=False):
+        """
+        Delete documents whose last access is older than the TTL.
+
+        Args:
+            force (bool): Run even if the last collection was within GC_INTERVAL_SECONDS
+
+        Returns:
+            int: Number of documents deleted
+        """
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_gc < GC_INTERVAL_SECONDS:
+                return 0
+            self._last_gc = now
+
+        deleted = 0
+        for shard in os.listdir(self.root):
+            shard_path = os.path.join(self.root, shard)
+            if not os.path.isdir(shard_path):
+                continue
+            for doc_id in os.listdir(shard_path):
+                directory = os.path.join(shard_path, doc_id)
+                try:
+                    expired = now - os.path.getmtime(directory) > self.ttl_seconds
+                except OSError:
+                    continue
+                if expired:
+                    shutil.rmtree(directory, ignore_errors=True)
+                    with self._lock:
+                        self._last_touch.pop(doc_id, None)
+                    deleted += 1
+        if deleted:
+            print(f"🗑️ Removed {deleted} expired document(s) from the document store")
+        return deleted
+
+    def _page_index(self, doc_id):
+        """Load the [offset, length] list of a document's compressed pages."""
+        try:
+            with open(os.path.join(self._directory(doc_id), "pages.json"), "rb") as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return []
+
+    def _directory(self, doc_id):
+        """Directory holding a document's files."""
+        return os.path.join(self.root, doc_id[:2], doc_id)
+
+    @staticmethod
+    def _write_atomic(path, data):
+        """Write a file so readers never see it half written."""
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_document_store():
+    """
+    Get the process-wide document store, creating it on first use.
+
+    Returns:
+        DocumentStore: Shared document store
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DocumentStore()
+        return _store
@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from utils.get_embeddings import get_embeddings_batch
+from utils.embedders import get_embedder
+
+
+def batch_chunks(chunks, max_batch_size=256, max_batch_chars=200000, get_text=None):
+    """
+    Group chunks into size-bounded batches for the embeddings endpoint.
+
+    A batch is closed as soon as adding the next chunk would exceed either
+    the number of inputs or the total number of characters allowed.
+
+    Args:
+        chunks (iterable): Text chunks to group
+        max_batch_size (int): Maximum number of chunks per batch
+        max_batch_chars (int): Maximum total characters per batch
+        get_text (callable, optional): Returns the text of a chunk item. Defaults to
+                                       treating each item as the text itself
+
+    Yields:
+        tuple: (start_index, list of chunks) for each batch
+    """
+    batch = []
+    batch_chars = 0
+    start_index = 0
+
+    for i, chunk in enumerate(chunks):
+        chunk_chars = len(get_text(chunk) if get_text else chunk)
+        if batch and (len(batch) >= max_batch_size or batch_chars + chunk_chars > max_batch_chars):
+            yield start_index, batch
+            batch = []
+            batch_chars = 0
+            start_index = i
+        batch.append(chunk)
+        batch_chars += chunk_chars
+
+    if batch:
+        yield start_index, batch
+
+
+def embed_chunks(chunks, max_batch_size=256, max_batch_chars=200000, max_workers=4, get_text=None, embedder=None):
+    """
+    Embed chunks in batches, keeping several requests in flight at once.
+
+    Batches are yielded as soon as they finish, so results can arrive out of
+    order; the start index identifies where each batch sits in `chunks`.
+    At most `max_workers * 2` batches are pending at any time.
+
+    Args:
+        chunks (iterable): Text chunks to embed
+        max_batch_size (int): Maximum number of chunks per request
+        max_batch_chars (int): Maximum total characters per request
+        max_workers (int): Number of concurrent embedding requests
+        get_text (callable, optional): Returns the text of a chunk item. Defaults to
+                                       treating each item as the text itself
+        embedder (Embedder, optional): Embedder to use. Defaults to get_embedder()
+
+    Yields:
+        tuple: (start_index, list of chunks, array of embeddings or None if the batch failed)
+    """
+    # Resolve the embedder once so every worker shares it (and its client's connection pool)
+    embedder = embedder or get_embedder()
+
+    batches = batch_chunks(chunks, max_batch_size, max_batch_chars, get_text)
+    max_pending = max_workers * 2
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        for start_index, batch in batches:
+            texts = [get_text(chunk) for chunk in batch] if get_text else batch
+            future = executor.submit(get_embeddings_batch, texts, embedder)
+            pending[future] = (start_index, batch)
+
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, items = pending.pop(future)
+                    yield start, items, future.result()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                start, items = pending.pop(future)
+                yield start, items, future.result()
@@ -0,0 +1,225 @@
+import re
+import zlib
+import threading
+import numpy as np
+from utils.embedding_cache import get_embedding_cache
+from utils.get_api_client import get_openai_client
+from utils.get_setting import get_setting
+from utils.count_tokens import count_tokens
+from utils.openai_gateway import get_openai_gateway, INTERACTIVE
+
+DEFAULT_EMBEDDER = "openai"
+
+# Collections created before embedders were recorded were built with this model
+LEGACY_MODEL_ID = "text-embedding-3-small"
+
+# Full output size of the OpenAI embedding models
+MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+
+
+class Embedder:
+    """
+    Interface for turning texts into embedding vectors.
+
+    Implementations set `model_id` (recorded on collections they build) and
+    `dimension`, and implement `embed`. Errors are raised, not rendered, so
+    embedders can be used from worker threads.
+    """
+
+    model_id = None
+    dimension = None
+
+    def embed(self, texts, priority=INTERACTIVE):
+        """
+        Embed a batch of texts.
+
+        Args:
+            texts (list): Texts to embed
+            priority (str): Gateway lane of any API request, INTERACTIVE or BULK
+
+        Returns:
+            numpy.ndarray: float32 array of shape (len(texts), dimension)
+        """
+        raise NotImplementedError
+
+
+class OpenAIEmbedder(Embedder):
+    """
+    Embeddings from the OpenAI API, backed by the persistent embedding cache.
+
+    With `dimensions` set, the API returns shortened (still unit length)
+    vectors, and the model id becomes "<model>@<dimensions>" so cached vectors
+    and collections of different sizes never mix.
+    """
+
+    def __init__(self, model="text-embedding-3-small", dimensions=None, client=None):
+        """
+        Args:
+            model (str): OpenAI embedding model name
+            dimensions (int, optional): Shortened output size. Defaults to the full model size
+            client (OpenAI, optional): Client to use. Defaults to get_openai_client()
+        """
+        self.model = model
+        self.model_id = f"{model}@{dimensions}" if dimensions else model
+        self.dimension = dimensions or MODEL_DIMENSIONS.get(model, 1536)
+        self._dimensions = dimensions
+        self._client = client
+
+    def embed(self, texts, priority=INTERACTIVE):
+        texts = list(texts)
+        cache = get_embedding_cache()
+        cached = cache.get_many(self.model_id, texts) if cache else [None] * len(texts)
+
+        # Only send each distinct uncached text once
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+        fresh_by_text = {}
+        if missing:
+            client = self._client or get_openai_client()
+            if not client:
+                raise RuntimeError("OpenAI client is not available")
+            options = {'dimensions': self._dimensions} if self._dimensions else {}
+            response = get_openai_gateway().call(
+                lambda: client.embeddings.create(input=missing, model=self.model, **options),
+                tokens=sum(count_tokens(text) for text in missing),
+                priority=priority
+            )
+            # The API does not guarantee ordering, so sort by the returned index
+            fresh = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            if cache:
+                cache.put_many(self.model_id, missing, fresh)
+            fresh_by_text = dict(zip(missing, fresh))
+
+        return np.array(
+            [vector if vector is not None else fresh_by_text[text] for text, vector in zip(texts, cached)],
+            dtype=np.float32
+        ).reshape(len(texts), self.dimension)
+
+
+class LocalHashEmbedder(Embedder):
+    """
+    Offline embeddings from hashed word and character n-gram features.
+
+    Every feature is hashed to one signed bucket of the output vector (a sparse
+    random projection), so no vocabulary or model file is needed and the same
+    text always gets the same vector. Suited to air-gapped tests, benchmarks
+    and low-stakes corpora; it captures lexical, not semantic, similarity.
+    """
+
+    _WORDS = re.compile(r'\w+')
+
+    def __init__(self, dimension=512):
+        """
+        Args:
+            dimension (int): Dimension of the output vectors
+        """
+        self.dimension = dimension
+        self.model_id = f"local-hash-ngram-{dimension}"
+
+    def _features(self, text):
+        """Words, word bigrams and padded character trigrams of a text."""
+        words = self._WORDS.findall(text.lower())
+        features = list(words)
+        features.extend(f"{first} {second}" for first, second in zip(words, words[1:]))
+        for word in words:
+            padded = f"<{word}>"
+            features.extend(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts, priority=INTERACTIVE):
+        texts = list(texts)
+        rows = []
+        hashes = []
+        for row, text in enumerate(texts):
+            row_hashes = [zlib.crc32(feature.encode('utf-8')) for feature in self._features(text)]
+            rows.append(np.full(len(row_hashes), row, dtype=np.int64))
+            hashes.append(np.array(row_hashes, dtype=np.uint32))
+
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        if rows:
+            rows = np.concatenate(rows)
+            hashes = np.concatenate(hashes)
+            buckets = (hashes % self.dimension).astype(np.int64)
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors, (rows, buckets), signs)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+_embedders = {}
+_lock = threading.Lock()
+
+
+def get_embedder_by_id(model_id):
+    """
+    Get the shared embedder for a recorded model id.
+
+    Args:
+        model_id (str): Model id recorded on a collection
+
+    Returns:
+        Embedder: Embedder producing vectors for that model id
+    """
+    with _lock:
+        embedder = _embedders.get(model_id)
+        if embedder is None:
+            if model_id.startswith("local-hash-ngram-"):
+                embedder = LocalHashEmbedder(dimension=int(model_id.rsplit('-', 1)[1]))
+            elif '@' in model_id:
+                model, dimensions = model_id.rsplit('@', 1)
+                embedder = OpenAIEmbedder(model=model, dimensions=int(dimensions))
+            else:
+                embedder = OpenAIEmbedder(model=model_id)
+            _embedders[model_id] = embedder
+        return embedder
+
+
+def get_embedder(name=None):
+    """
+    Get the embedder used to build new collections.
+
+    The EMBEDDING_DIMENSIONS setting shortens the vectors of either embedder.
+
+    Args:
+        name (str, optional): 'openai' or 'local'. Defaults to the EMBEDDER setting
+
+    Returns:
+        Embedder: Configured embedder
+    """
+    if name is None:
+        name = get_setting("EMBEDDER", DEFAULT_EMBEDDER)
+    dimensions = get_setting("EMBEDDING_DIMENSIONS")
+    if name == "local":
+        return get_embedder_by_id(LocalHashEmbedder(dimension=int(dimensions) if dimensions else 512).model_id)
+    return get_embedder_by_id(f"{LEGACY_MODEL_ID}@{int(dimensions)}" if dimensions else LEGACY_MODEL_ID)
+
+
+def get_collection_embedder(collection):
+    """
+    Get the embedder that built a collection, so queries use the same vector space.
+
+    Args:
+        collection: ChromaDB collection
+
+    Returns:
+        Embedder: Embedder recorded in the collection metadata
+    """
+    metadata = collection.metadata or {}
+    return get_embedder_by_id(metadata.get('embedder', LEGACY_MODEL_ID))
+
+
+def embedder_metadata(embedder):
+    """
+    Build the collection metadata that records an embedder.
+
+    Args:
+        embedder (Embedder): Embedder building the collection
+
+    Returns:
+        dict: Metadata with the embedder's model id and dimension
+    """
+    return {'embedder': embedder.model_id, 'dimension': embedder.dimension}
+
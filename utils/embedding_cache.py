@@ -0,0 +1,173 @@
+import time
+import hashlib
+import unicodedata
+from array import array
+from utils.sqlite_store import SQLiteStore, EVICTION_HEADROOM, shared_instance
+
+
+class EmbeddingCache(SQLiteStore):
+    """
+    Persistent, content-addressed cache of embedding vectors.
+
+    Vectors are stored as float32 blobs in SQLite, keyed by the embedding
+    model name and a hash of the normalized text. When the stored vectors
+    exceed `max_bytes`, the least recently used entries are evicted.
+    """
+
+    SCHEMA = (
+        """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)"
+    )
+
+    def __init__(self, path="./notebook_cache/embeddings.sqlite3", max_bytes=256 * 1024 * 1024):
+        """
+        Open the cache.
+
+        Args:
+            path (str): SQLite file to store the cache in
+            max_bytes (int): Maximum total size of stored vectors
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        super().__init__(path)
+
+    @staticmethod
+    def text_hash(text):
+        """
+        Hash text after normalizing unicode and whitespace.
+
+        Args:
+            text (str): Text to hash
+
+        Returns:
+            str: Hex digest identifying the normalized text
+        """
+        normalized = ' '.join(unicodedata.normalize('NFC', text).split())
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def get_many(self, model, texts):
+        """
+        Look up cached vectors for several texts at once.
+
+        Args:
+            model (str): Embedding model name
+            texts (list): Texts to look up
+
+        Returns:
+            list: Vector (list of floats) or None for each text, in input order
+        """
+        hashes = [self.text_hash(text) for text in texts]
+        found = {}
+        now = time.time()
+
+        with self._lock:
+            unique_hashes = list(set(hashes))
+            # Stay well below SQLite's bound parameter limit
+            for i in range(0, len(unique_hashes), 500):
+                part = unique_hashes[i:i + 500]
+                placeholders = ','.join('?' * len(part))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *part]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array('f', blob).tolist()
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, text_hash) for text_hash in found]
+                )
+                self._conn.commit()
+
+            results = [found.get(text_hash) for text_hash in hashes]
+            hit_count = sum(1 for result in results if result is not None)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+
+        return results
+
+    def put_many(self, model, texts, vectors):
+        """
+        Store vectors for several texts and evict old entries if over budget.
+
+        Args:
+            model (str): Embedding model name
+            texts (list): Texts that were embedded
+            vectors (list): Embedding vectors in the same order as `texts`
+        """
+        now = time.time()
+        rows = [
+            (model, self.text_hash(text), array('f', vector).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_access) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        total_bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+
+        to_free = total_bytes - int(self.max_bytes * (1 - EVICTION_HEADROOM))
+        freed = 0
+        stale = []
+        for model, text_hash, size in self._conn.execute(
+            "SELECT model, text_hash, LENGTH(vector) FROM embeddings ORDER BY last_access"
+        ):
+            stale.append((model, text_hash))
+            freed += size
+            if freed >= to_free:
+                break
+
+        self._conn.executemany("DELETE FROM embeddings WHERE model = ? AND text_hash = ?", stale)
+        print(f"🧹 Evicted {len(stale)} cached embeddings")
+
+    def stats(self):
+        """
+        Get cache counters and size.
+
+        Returns:
+            dict: Hits, misses, hit rate, stored entries and stored bytes
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': entries,
+                'bytes': size
+            }
+
+
+_shared_cache = shared_instance(EmbeddingCache, "Embedding cache")
+
+
+def get_embedding_cache():
+    """
+    Get the process-wide embedding cache, creating it on first use.
+
+    Returns:
+        EmbeddingCache or None: Shared cache or None if it cannot be opened
+    """
+    return _shared_cache()
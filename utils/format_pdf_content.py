@@ -1,3 +1,6 @@
+from utils.normalize_text import normalize_display_text
+
+
 def format_pdf_content(raw_content):
     """
     Format raw PDF content for better display.
@@ -11,29 +14,8 @@ def format_pdf_content(raw_content):
     if not raw_content or raw_content.startswith("Error"):
         return raw_content
     
-    # Clean up the text
-    lines = raw_content.split('\n')
-    formatted_lines = []
-    
-    for line in lines:
-        # Remove extra whitespace
-        line = line.strip()
-        
-        # Skip empty lines
-        if not line:
-            continue
-            
-        # Add the line to formatted content
-        formatted_lines.append(line)
-    
-    # Join lines with proper spacing
-    formatted_content = '\n'.join(formatted_lines)
-    
-    # Clean up multiple consecutive newlines
-    while '\n\n\n' in formatted_content:
-        formatted_content = formatted_content.replace('\n\n\n', '\n\n')
-    
-    return formatted_content
+    # Strip lines and drop blank ones in one pass
+    return normalize_display_text(raw_content)
 
 
 def get_content_preview(content, max_lines=50):
@@ -58,4 +40,20 @@ def get_content_preview(content, max_lines=50):
     preview = '\n'.join(preview_lines)
     preview += f"\n\n... (showing first {max_lines} lines of {len(lines)} total lines)"
     
-    return preview 
\ No newline at end of file
+    return preview 
+
+
+def truncate_page_text(text, max_chars=20000):
+    """
+    Cut the text of a preview page to a size the browser can render quickly.
+
+    Args:
+        text (str): Text of one page
+        max_chars (int): Maximum number of characters to return
+
+    Returns:
+        str: The text, cut to max_chars with a note if it was longer
+    """
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + f"\n\n... (showing first {max_chars:,} of {len(text):,} characters on this page)"
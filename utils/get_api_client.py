@@ -1,16 +1,18 @@
 import streamlit as st
-from openai import OpenAI
+from utils.client_registry import get_pooled_openai_client
 
 def get_openai_client():
     """
     Get OpenAI client with API key from secrets.
+
+    The client is shared process-wide so its connection pool is reused.
     
     Returns:
         OpenAI: OpenAI client instance
     """
     try:
         api_key = st.secrets["OPENAI_KEY"]
-        return OpenAI(api_key=api_key)
+        return get_pooled_openai_client(api_key)
     except Exception as e:
         st.error(f"Error initializing OpenAI client: {str(e)}")
         return None
\ No newline at end of file
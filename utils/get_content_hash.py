@@ -0,0 +1,16 @@
+import hashlib
+
+
+def get_content_hash(content):
+    """
+    Get a stable hash identifying a document's content.
+
+    Args:
+        content (str or bytes): Extracted text or raw file bytes
+
+    Returns:
+        str: SHA-256 hex digest of the content
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
@@ -1,24 +1,43 @@
-import streamlit as st
-from openai import OpenAI
-from utils.get_api_client import get_openai_client
+from utils.embedders import get_embedder
+from utils.openai_gateway import BULK
 
-def get_embeddings(text):
+def get_embeddings(text, embedder=None):
     """
-    Create embeddings for given text using OpenAI API.
+    Create embeddings for given text with the configured embedder.
     
     Args:
         text (str): Text to create embeddings for
+        embedder (Embedder, optional): Embedder to use. Defaults to get_embedder()
         
     Returns:
         list or None: Embedding vector or None if error
     """
     try:
-        client = get_openai_client()
-        response = client.embeddings.create(
-            input=text,
-            model="text-embedding-3-small"
-        )
-        return response.data[0].embedding
+        embedder = embedder or get_embedder()
+        return embedder.embed([text])[0].tolist()
     except Exception as e:
-        st.error(f"Error creating embeddings: {str(e)}")
+        print(f"Error creating embeddings: {str(e)}")
+        return None
+
+
+def get_embeddings_batch(texts, embedder=None, priority=BULK):
+    """
+    Create embeddings for a list of texts in one request.
+
+    Safe to call from worker threads: errors are logged instead of being
+    rendered with Streamlit, and the caller decides how to report them.
+
+    Args:
+        texts (list): Texts to create embeddings for
+        embedder (Embedder, optional): Embedder to use. Defaults to get_embedder()
+        priority (str): Gateway lane of the request. Batches are ingestion work, so BULK
+
+    Returns:
+        numpy.ndarray or None: Embedding vectors in input order or None if error
+    """
+    try:
+        embedder = embedder or get_embedder()
+        return embedder.embed(texts, priority)
+    except Exception as e:
+        print(f"Error creating batch embeddings: {str(e)}")
         return None
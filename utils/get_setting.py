@@ -0,0 +1,24 @@
+import os
+import streamlit as st
+
+def get_setting(name, default=None):
+    """
+    Read an optional setting from Streamlit secrets or the environment.
+
+    Secrets win over the environment, where the setting is looked up with a
+    NOTEBOOK_ prefix (EMBEDDER is read from NOTEBOOK_EMBEDDER).
+
+    Args:
+        name (str): Setting name as used in secrets.toml
+        default: Value returned if the setting is not configured
+
+    Returns:
+        The configured value, or default
+    """
+    try:
+        if name in st.secrets:
+            return st.secrets[name]
+    except Exception:
+        # No secrets file, e.g. when running outside `streamlit run`
+        pass
+    return os.environ.get(f"NOTEBOOK_{name}", default)
@@ -3,63 +3,43 @@ from utils.db_compatibility import setup_sqlite3_compatibility
 setup_sqlite3_compatibility()
 
 import streamlit as st
-import chromadb
-from chromadb.config import Settings
-import os
+from utils.vector_store import get_vector_store
+from utils.ingest_checkpoint import get_ingest_checkpoint
+from utils.collection_eviction import get_collection_eviction_manager
+from utils.sanitize_collection_name import get_collection_namespace
 
 
 def clear_chroma_db(collection_name=None):
     """
-    Clear all documents from ChromaDB collection(s).
+    Clear all documents from the vector store collection(s).
+
+    Works on the configured vector store backend (ChromaDB by default), and
+    only on this deployment's namespace.
     
     Args:
         collection_name (str, optional): Name of specific collection to clear.
-                                       If None, clears all collections.
+                                       If None, clears all collections of the namespace.
         
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        persist_directory = "./chrome_store"
-        
-        # Try to create the directory if it doesn't exist
-        try:
-            os.makedirs(persist_directory, exist_ok=True)
-        except:
-            pass
-        
-        # Use more compatible ChromaDB configuration
-        try:
-            chroma_client = chromadb.PersistentClient(path=persist_directory)
-        except Exception as e:
-            # Fallback to in-memory client if persistent storage fails
-            print(f"Warning: Persistent storage failed, using in-memory client: {e}")
-            chroma_client = chromadb.Client()
-        
         if collection_name:
-            # Clear specific collection
-            try:
-                collection = chroma_client.get_collection(name=collection_name)
-                all_items = collection.get()
-                if all_items['ids']:
-                    collection.delete(ids=all_items['ids'])
-                    print(f"🗑️ Cleared ChromaDB collection '{collection_name}'")
-                else:
-                    print(f"📭 ChromaDB collection '{collection_name}' was already empty")
-                return True
-            except Exception as e:
-                print(f"Collection '{collection_name}' not found or already cleared")
-                return True
+            # Clear specific collection; its chunks must be re-embedded on the next ingest
+            drop_collection(collection_name)
+            print(f"🗑️ Cleared collection '{collection_name}'")
+            return True
         else:
             # Clear all collections
             try:
-                collections = chroma_client.list_collections()
-                if collections:
-                    for collection in collections:
-                        chroma_client.delete_collection(name=collection.name)
-                        print(f"🗑️ Deleted ChromaDB collection '{collection.name}'")
+                prefix = f"{get_collection_namespace()}."
+                collection_names = [name for name in get_vector_store().list_collections() if name.startswith(prefix)]
+                if collection_names:
+                    for name in collection_names:
+                        drop_collection(name)
+                        print(f"🗑️ Deleted collection '{name}'")
                 else:
-                    print("📭 No ChromaDB collections found")
+                    print("📭 No collections found")
                 return True
             except Exception as e:
                 print(f"Error clearing all collections: {str(e)}")
@@ -70,35 +50,57 @@ def clear_chroma_db(collection_name=None):
         return False
 
 
-def get_chroma_collection(collection_name, persist_directory="./chrome_store"):
+def drop_collection(collection_name):
+    """
+    Delete a collection with everything in it, along with its checkpoints and usage record.
+
+    Dropping is a single delete in the store, however many chunks it holds.
+    
+    Args:
+        collection_name (str): Name of the collection
+    """
+    get_vector_store().delete_collection(collection_name)
+    get_ingest_checkpoint().forget(collection_name)
+    get_collection_eviction_manager().forget(collection_name)
+
+
+def recreate_collection(collection_name, metadata=None):
     """
-    Get or create a ChromaDB collection.
+    Replace a collection with a new, empty one.
     
     Args:
         collection_name (str): Name of the collection
-        persist_directory (str): Directory to persist ChromaDB data
+        metadata (dict, optional): Metadata of the new collection
         
     Returns:
-        Collection or None: ChromaDB collection or None if error
+        Collection or None: The empty collection or None if error
     """
-    print(f"Collection name: {collection_name}")
     try:
-        # Try to create the directory if it doesn't exist
-        try:
-            os.makedirs(persist_directory, exist_ok=True)
-        except:
-            pass
-        
-        # Use more compatible ChromaDB configuration
-        try:
-            chroma_client = chromadb.PersistentClient(path=persist_directory)
-        except Exception as e:
-            # Fallback to in-memory client if persistent storage fails
-            print(f"Warning: Persistent storage failed, using in-memory client: {e}")
-            chroma_client = chromadb.Client()
+        drop_collection(collection_name)
+    except Exception as e:
+        st.error(f"Error dropping collection: {str(e)}")
+        return None
+    return get_vector_collection(collection_name, metadata)
+
+
+def get_vector_collection(collection_name, metadata=None, create=True):
+    """
+    Get or create a collection in the configured vector store.
+
+    Collections from every backend support name, metadata, count, upsert and query.
+    
+    Args:
+        collection_name (str): Name of the collection
+        metadata (dict, optional): Metadata recorded if the collection is created,
+                                   such as the embedder that builds it
+        create (bool): Create the collection if it does not exist
         
-        collection = chroma_client.get_or_create_collection(name=collection_name)
-        return collection
+    Returns:
+        Collection or None: Collection, or None if error or if it does not exist
+                            and create is False
+    """
+    try:
+        return get_vector_store().get_collection(collection_name, metadata, create)
     except Exception as e:
-        st.error(f"Error accessing ChromaDB collection: {str(e)}")
+        st.error(f"Error accessing vector store collection: {str(e)}")
         return None
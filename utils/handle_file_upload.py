@@ -1,52 +1,143 @@
-import streamlit as st
-from utils.get_embeddings import get_embeddings
-from utils.get_chunks import get_chunks
-from utils.handle_db import get_chroma_collection
+from utils.embed_chunks import embed_chunks
+from utils.iter_chunks import iter_chunks
 from utils.sanitize_collection_name import sanitize_collection_name
+from utils.document_insights import schedule_document_insights
+from utils.get_content_hash import get_content_hash
+from utils.ingest_checkpoint import get_ingest_checkpoint
+from utils.embedders import get_embedder, get_collection_embedder, embedder_metadata
+from utils.vector_store import get_vector_store
+from utils.collection_eviction import get_collection_eviction_manager
 
-def handle_file_upload(uploaded_file):
+def handle_file_upload(uploaded_file, on_progress=None):
     """
     Process uploaded file and store it in ChromaDB.
     
+    Chunk ids are derived from the document and chunk content hashes and
+    written with upsert, and every stored batch is checkpointed. Repeating or
+    resuming an interrupted ingest only embeds the chunks that are missing.
+    
+    Runs on ingestion worker threads, where Streamlit messages are not shown,
+    so failures are raised for the job to record.
+    
     Args:
-        uploaded_file (dict): Document dictionary containing file info and content
+        uploaded_file (dict): Document dictionary containing file info and content,
+                              and optionally the 'page_offsets' of its pages and
+                              the 'collection' to store it in (defaults to the
+                              sanitized filename)
+        on_progress (callable, optional): Called with the number of chunks embedded
+                                          so far after each batch is stored
         
     Returns:
-        bool: True if successful, False otherwise
-    """
-    try:
-        # Extract information from the document dictionary
-        collection_name = sanitize_collection_name(uploaded_file['name'])
-        content = uploaded_file['content']
-        
-        # Check if content is valid
-        if not content or content.startswith("Error") or content == "No text content found in PDF":
-            st.warning(f"Skipping {collection_name} - no valid content to process")
-            return False
-        
-        # Process the content into chunks
-        knowledge_chunks = get_chunks(content, chunk_size=50)
-
-        # Get ChromaDB collection (remove file extension from collection name)
-        collection = get_chroma_collection(collection_name=collection_name)
-        if not collection:
-            return False
-
-        # Process chunks and add to ChromaDB
-        successful_chunks = 0
-        for i, chunk in enumerate(knowledge_chunks):
-            embedding = get_embeddings(chunk)
-            if embedding:  # Only add if embedding was successful
-                collection.add(
-                    ids=[f"chunk-{i+1}"],
-                    documents=[chunk],    
-                    embeddings=[embedding]
-                )
-                successful_chunks += 1
-        
-        print(f"Processed {successful_chunks}/{len(knowledge_chunks)} chunks for ChromaDB")
-        return successful_chunks > 0
+        int: Number of chunks stored for the document
         
-    except Exception as e:
-        st.error(f"Error processing documents for ChromaDB: {str(e)}")
-        return False
+    Raises:
+        ValueError: If the document has no text to store
+        RuntimeError: If some chunks could not be embedded. The stored ones are
+                      checkpointed, so indexing the document again resumes
+    """
+    # Extract information from the document dictionary
+    collection_name = uploaded_file.get('collection') or sanitize_collection_name(uploaded_file['name'])
+    content = uploaded_file['content']
+    page_offsets = uploaded_file.get('page_offsets')
+    
+    # Check if content is valid
+    if not content or content.startswith("Error") or content == "No text content found in PDF":
+        raise ValueError("No valid content to process")
+    
+    doc_hash = get_content_hash(content)
+    checkpoint = get_ingest_checkpoint()
+
+    # Get ChromaDB collection (remove file extension from collection name).
+    # New collections record the configured embedder; existing ones keep theirs
+    collection = get_vector_store().get_collection(collection_name, embedder_metadata(get_embedder()))
+    embedder = get_collection_embedder(collection)
+
+    # Nothing to do if this exact content was fully stored before and is still there
+    completed_count = checkpoint.completed_chunk_count(collection_name, doc_hash)
+    if completed_count is not None and collection.count() >= completed_count:
+        print(f"Skipping {collection_name} - all {completed_count} chunks already stored")
+        if on_progress:
+            on_progress(completed_count)
+        schedule_document_insights(content)
+        return completed_count
+
+    stored_ids = checkpoint.stored_ids(collection_name, doc_hash)
+    if stored_ids and collection.count() < len(stored_ids):
+        # The collection lost rows the checkpoint still lists (a wiped store, or the
+        # in-memory fallback after a restart), so only trust ids it still holds
+        stored_ids = _ids_in_collection(collection, list(stored_ids))
+    seen_ids = set()
+    total_chunks = 0
+
+    def missing_chunks():
+        # Stream sentence-aware, token-budgeted chunks, skipping the ones already stored
+        nonlocal total_chunks
+        for chunk in iter_chunks(content, page_offsets=page_offsets):
+            chunk['id'] = _chunk_id(doc_hash, chunk['text'])
+            if chunk['id'] in seen_ids:
+                continue
+            seen_ids.add(chunk['id'])
+            total_chunks += 1
+            if chunk['id'] not in stored_ids:
+                yield chunk
+
+    # Embed chunks in concurrent batches and upsert each batch to ChromaDB in bulk
+    successful_chunks = 0
+    failed_batches = 0
+    for start_index, batch, embeddings in embed_chunks(missing_chunks(), get_text=lambda chunk: chunk['text'], embedder=embedder):
+        if embeddings is None:
+            failed_batches += 1
+            continue
+        collection.upsert(
+            ids=[chunk['id'] for chunk in batch],
+            documents=[chunk['text'] for chunk in batch],
+            embeddings=embeddings.tolist(),
+            metadatas=[{
+                'doc_hash': doc_hash,
+                'chunk_index': chunk['index'],
+                'start': chunk['start'],
+                'end': chunk['end'],
+                'page_start': chunk['page_start'],
+                'page_end': chunk['page_end']
+            } for chunk in batch]
+        )
+        checkpoint.mark_stored(collection_name, doc_hash, [chunk['id'] for chunk in batch])
+        successful_chunks += len(batch)
+        if on_progress:
+            on_progress(len(stored_ids) + successful_chunks)
+
+    if not failed_batches:
+        checkpoint.mark_complete(collection_name, doc_hash, total_chunks)
+    
+    # Track the collection's new size for the store budget
+    get_collection_eviction_manager().touch(collection_name, get_vector_store().collection_size(collection_name))
+    
+    resumed = f" ({len(stored_ids)} already stored)" if stored_ids else ""
+    print(f"Processed {successful_chunks}/{total_chunks} chunks for ChromaDB{resumed}")
+    successful_chunks += len(stored_ids)
+    
+    if failed_batches:
+        raise RuntimeError(
+            f"{failed_batches} embedding batch(es) failed; {successful_chunks} of {total_chunks} "
+            "chunks stored; indexing it again resumes from them"
+        )
+    if successful_chunks == 0:
+        raise ValueError("No chunks could be embedded")
+    
+    # Precompute summary, key points and details for the quick-question buttons
+    schedule_document_insights(content)
+    
+    return successful_chunks
+
+
+def _ids_in_collection(collection, chunk_ids, batch_size=1000):
+    """Get the subset of chunk ids that are actually stored in a collection."""
+    present = set()
+    for i in range(0, len(chunk_ids), batch_size):
+        present.update(collection.get(ids=chunk_ids[i:i + batch_size], include=[])['ids'])
+    return present
+
+
+def _chunk_id(doc_hash, chunk_text):
+    """Build a deterministic chunk id from the document hash and the chunk's own hash."""
+    return f"{doc_hash[:16]}-{get_content_hash(chunk_text)[:16]}"
@@ -1,71 +1,210 @@
 import streamlit as st
-from utils.get_embeddings import get_embeddings
-from utils.handle_db import get_chroma_collection
+from utils.retrieve_chunks import retrieve_chunks
+from utils.assemble_context import assemble_context
 from utils.get_api_client import get_openai_client
+from utils.openai_gateway import get_openai_gateway
+from utils.count_tokens import count_tokens
+from utils.get_embeddings import get_embeddings
+from utils.embedders import get_embedder
+from utils.answer_cache import get_answer_cache, AnswerCache
+from utils.get_setting import get_setting
+from utils.vector_store import DEFAULT_VECTOR_STORE
 from utils.sanitize_collection_name import sanitize_collection_name
 
 
-def handle_result(question, selected_doc_indices, uploaded_documents, n_results=2):
+CHAT_MODEL = "gpt-4"
+
+# Chunks retrieved as candidates, and the token budget the context is packed into
+CANDIDATE_CHUNKS = 12
+CONTEXT_TOKENS = 800
+
+# Tokens reserved for the answer when charging a request to the rate budget
+ANSWER_TOKENS = 700
+
+
+def handle_result(question, selected_doc_indices, uploaded_documents, n_results=CANDIDATE_CHUNKS):
     """
     Query the knowledge base with a question and get AI response.
     
+    Answers to the same or a similar question about the same documents are
+    served from the answer cache without calling the model.
+    
     Args:
         question (str): The question to ask
         selected_doc_indices (list): List of selected document indices
         uploaded_documents (list): List of uploaded documents
-        n_results (int): Number of results to retrieve
+        n_results (int): Number of candidate chunks to retrieve across all selected documents
         
     Returns:
         str or None: AI response or None if error
     """
     try:
-        print(question, 'question', selected_doc_indices, 'selected_doc_indices', uploaded_documents, 'uploaded_documents')
-        # Get embeddings for the question
-        query_embedding = get_embeddings(question)
-        if not query_embedding:
-            return None
-            
-        # Get ChromaDB collection and query results
-        all_documents = []
+        cached, cache_entry = _lookup_cached_answer(question, selected_doc_indices, uploaded_documents, n_results)
+        if cached:
+            return cached
         
-        for index in selected_doc_indices:  
-            collection_name = sanitize_collection_name(uploaded_documents[index]['name'])
-            collection = get_chroma_collection(collection_name)
-            
-            if not collection:
-                continue
-                
-            # Query the collection
-            collection_results = collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results
-            )
-            
-            # Add the documents from this collection to our results
-            if collection_results and 'documents' in collection_results:
-                for doc_list in collection_results['documents']:
-                    all_documents.extend(doc_list)
+        messages, skipped = _build_messages(question, selected_doc_indices, uploaded_documents, n_results)
+        if skipped:
+            # An answer from only some of the documents must not be served for all of them
+            cache_entry = None
         
         # Get OpenAI client
-        print(all_documents, 'all_documents')
         client = get_openai_client()
-        if not client or not all_documents:
+        if not client or not messages:
             return None
             
-        # Combine all documents into context
-        context = "\n\n".join(all_documents)  # Limit to top 10 most relevant chunks
-            
         # Generate response using retrieved context
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{
-                "role": "user",
-                "content": f"You are a helpful and high level document assistant. Given the following context from documents: {context} and the question: {question}, provide a comprehensive and helpful answer. Keep a human touch in your response."
-            }]
+        response = get_openai_gateway().call(
+            lambda: client.chat.completions.create(model=CHAT_MODEL, messages=messages),
+            tokens=_estimate_tokens(messages)
         )
         
-        return response.choices[0].message.content
+        answer = response.choices[0].message.content
+        _store_answer(cache_entry, question, answer)
+        return answer
         
     except Exception as e:
         st.error(f"Error querying knowledge base: {str(e)}")
         return None
+
+
+def handle_result_stream(question, selected_doc_indices, uploaded_documents, n_results=CANDIDATE_CHUNKS):
+    """
+    Query the knowledge base with a question and stream the AI response.
+    
+    Retrieval happens before the first token is yielded; the answer itself is
+    yielded piece by piece as the model generates it. A cached answer is
+    yielded in one piece.
+    
+    Args:
+        question (str): The question to ask
+        selected_doc_indices (list): List of selected document indices
+        uploaded_documents (list): List of uploaded documents
+        n_results (int): Number of candidate chunks to retrieve across all selected documents
+        
+    Yields:
+        str: Pieces of the AI response. Nothing is yielded if an error occurs
+    """
+    try:
+        cached, cache_entry = _lookup_cached_answer(question, selected_doc_indices, uploaded_documents, n_results)
+        if cached:
+            yield cached
+            return
+        
+        messages, skipped = _build_messages(question, selected_doc_indices, uploaded_documents, n_results)
+        if skipped:
+            # An answer from only some of the documents must not be served for all of them
+            cache_entry = None
+        
+        # Get OpenAI client
+        client = get_openai_client()
+        if not client or not messages:
+            return
+        
+        stream = get_openai_gateway().stream(
+            lambda: client.chat.completions.create(model=CHAT_MODEL, messages=messages, stream=True),
+            tokens=_estimate_tokens(messages)
+        )
+        
+        pieces = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                pieces.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+        
+        # Only a fully streamed answer is cached
+        _store_answer(cache_entry, question, "".join(pieces))
+        
+    except Exception as e:
+        st.error(f"Error querying knowledge base: {str(e)}")
+
+
+def get_answer_settings(n_results=CANDIDATE_CHUNKS):
+    """
+    Get the settings an answer depends on besides the question and documents.
+
+    Both the session memo and the shared answer cache key answers on these,
+    so an answer is never reused after retrieval or generation changes.
+
+    Args:
+        n_results (int): Number of candidate chunks retrieved across the selected documents
+
+    Returns:
+        tuple: Retrieval and chat settings
+    """
+    return (
+        n_results,
+        CONTEXT_TOKENS,
+        CHAT_MODEL,
+        get_embedder().model_id,
+        get_setting("VECTOR_STORE", DEFAULT_VECTOR_STORE),
+        get_setting("VECTOR_PRECISION", "float32"),
+        str(get_setting("VECTOR_RERANK", False)).lower() in ("1", "true", "yes")
+    )
+
+
+def _estimate_tokens(messages):
+    """Tokens a chat request is expected to use: its prompt plus room for the answer."""
+    return sum(count_tokens(message['content']) for message in messages) + ANSWER_TOKENS
+
+
+def _get_sources(selected_doc_indices, uploaded_documents):
+    """Map the collection of each selected document to the document's name."""
+    return {
+        uploaded_documents[index].get('collection') or sanitize_collection_name(uploaded_documents[index]['name']):
+            uploaded_documents[index]['name']
+        for index in selected_doc_indices
+    }
+
+
+def _lookup_cached_answer(question, selected_doc_indices, uploaded_documents, n_results):
+    """
+    Look the question up in the answer cache.
+
+    Returns (answer, cache_entry): the cached answer or None, and what
+    _store_answer needs to cache a new answer, or None if it must not be cached.
+    """
+    cache = get_answer_cache()
+    # Answers retrieved from a document that is still being indexed are incomplete
+    if not cache or any(uploaded_documents[index].get('status', 'ready') != 'ready' for index in selected_doc_indices):
+        return None, None
+    
+    embedder = get_embedder()
+    vector = get_embeddings(question, embedder)
+    if not vector:
+        return None, None
+    
+    doc_set = AnswerCache.doc_set_key(list(_get_sources(selected_doc_indices, uploaded_documents)), *get_answer_settings(n_results))
+    return cache.lookup(doc_set, embedder.model_id, vector), (cache, doc_set, embedder.model_id, vector)
+
+
+def _store_answer(cache_entry, question, answer):
+    """Cache a generated answer under the entry from _lookup_cached_answer."""
+    if cache_entry and answer:
+        cache, doc_set, model, vector = cache_entry
+        cache.put(doc_set, model, question, vector, answer)
+
+
+def _build_messages(question, selected_doc_indices, uploaded_documents, n_results):
+    """
+    Retrieve context for a question and build the chat messages.
+
+    Returns (messages, skipped): the messages, or None if nothing was found, and
+    the collections that could not be searched.
+    """
+    # Query every selected document's collection concurrently and keep the
+    # most relevant chunks overall, regardless of which file they came from
+    sources = _get_sources(selected_doc_indices, uploaded_documents)
+    hits, skipped = retrieve_chunks(question, list(sources), top_k=n_results)
+    # Keep the most relevant, least redundant chunks that fit the prompt budget
+    all_documents = assemble_context(hits, sources, max_tokens=CONTEXT_TOKENS)
+    if not all_documents:
+        return None, skipped
+    
+    # Combine all documents into context
+    context = "\n\n".join(all_documents)  # Ordered from most to least relevant
+    
+    return [{
+        "role": "user",
+        "content": f"You are a helpful and high level document assistant. Given the following context from documents: {context} and the question: {question}, provide a comprehensive and helpful answer. Keep a human touch in your response."
+    }], skipped
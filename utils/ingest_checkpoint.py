@@ -0,0 +1,135 @@
+from utils.sqlite_store import SQLiteStore, shared_instance
+
+
+class IngestCheckpoint(SQLiteStore):
+    """
+    Persistent record of which chunks of a document are already stored.
+
+    Rows are keyed by collection and document content hash, so an interrupted
+    or repeated ingest of the same text only embeds the chunks still missing.
+    """
+
+    SCHEMA = (
+        """
+            CREATE TABLE IF NOT EXISTS stored_chunks (
+                collection TEXT NOT NULL,
+                doc_hash TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                PRIMARY KEY (collection, doc_hash, chunk_id)
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS completed_documents (
+                collection TEXT NOT NULL,
+                doc_hash TEXT NOT NULL,
+                chunk_count INTEGER NOT NULL,
+                PRIMARY KEY (collection, doc_hash)
+            )
+        """
+    )
+
+    def __init__(self, path="./notebook_cache/ingest_checkpoints.sqlite3"):
+        """
+        Open the checkpoints.
+
+        Args:
+            path (str): SQLite file to store checkpoints in
+        """
+        super().__init__(path)
+
+    def stored_ids(self, collection, doc_hash):
+        """
+        Get the ids of the chunks already stored for a document.
+
+        Args:
+            collection (str): Collection name
+            doc_hash (str): Document content hash
+
+        Returns:
+            set: Stored chunk ids
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id FROM stored_chunks WHERE collection = ? AND doc_hash = ?",
+                (collection, doc_hash)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def mark_stored(self, collection, doc_hash, chunk_ids):
+        """
+        Record that chunks were written to the collection.
+
+        Args:
+            collection (str): Collection name
+            doc_hash (str): Document content hash
+            chunk_ids (list): Ids of the stored chunks
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO stored_chunks (collection, doc_hash, chunk_id) VALUES (?, ?, ?)",
+                [(collection, doc_hash, chunk_id) for chunk_id in chunk_ids]
+            )
+            self._conn.commit()
+
+    def mark_complete(self, collection, doc_hash, chunk_count):
+        """
+        Record that every chunk of a document is stored.
+
+        Args:
+            collection (str): Collection name
+            doc_hash (str): Document content hash
+            chunk_count (int): Number of chunks the document has
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completed_documents (collection, doc_hash, chunk_count) VALUES (?, ?, ?)",
+                (collection, doc_hash, chunk_count)
+            )
+            self._conn.commit()
+
+    def completed_chunk_count(self, collection, doc_hash):
+        """
+        Get the chunk count of a fully stored document.
+
+        Args:
+            collection (str): Collection name
+            doc_hash (str): Document content hash
+
+        Returns:
+            int or None: Number of chunks, or None if the document is not complete
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT chunk_count FROM completed_documents WHERE collection = ? AND doc_hash = ?",
+                (collection, doc_hash)
+            ).fetchone()
+        return row[0] if row else None
+
+    def forget(self, collection=None):
+        """
+        Drop checkpoints after their collection was cleared or deleted.
+
+        Args:
+            collection (str, optional): Collection to forget. If None, forgets all
+        """
+        with self._lock:
+            if collection is None:
+                self._conn.execute("DELETE FROM stored_chunks")
+                self._conn.execute("DELETE FROM completed_documents")
+            else:
+                self._conn.execute("DELETE FROM stored_chunks WHERE collection = ?", (collection,))
+                self._conn.execute("DELETE FROM completed_documents WHERE collection = ?", (collection,))
+            self._conn.commit()
+
+
+_shared_checkpoint = shared_instance(IngestCheckpoint)
+
+
+def get_ingest_checkpoint():
+    """
+    Get the process-wide ingest checkpoint store, creating it on first use.
+
+    Returns:
+        IngestCheckpoint: Shared checkpoint store
+    """
+    return _shared_checkpoint()
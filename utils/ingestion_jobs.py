@@ -0,0 +1,259 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.process_pdf_content import extract_pdf_text
+from utils.handle_file_upload import handle_file_upload
+from utils.document_record import build_document_record
+from utils.document_store import get_document_store
+from utils.ingest_checkpoint import get_ingest_checkpoint
+from utils.handle_db import get_vector_collection
+from utils.sanitize_collection_name import get_document_collection_name
+from utils.collection_eviction import get_collection_eviction_manager
+from utils.document_insights import get_document_insights, schedule_document_insights
+
+# Shared by every session in the process, so concurrent uploads queue up
+# instead of each holding a Streamlit script thread
+MAX_CONCURRENT_JOBS = 2
+
+# Finished jobs are forgotten after this many seconds
+JOB_RETENTION_SECONDS = 3600
+
+
+class IngestionJob:
+    """
+    Progress and result of extracting and indexing one uploaded document.
+
+    Attributes are written by the worker thread and only read by the UI. The
+    document itself lives in the document store under `doc_id`, and its
+    chunks in the vector collection named after it.
+    """
+
+    def __init__(self, name, file_type, doc_id, collection):
+        self.job_id = uuid.uuid4().hex
+        self.name = name
+        self.file_type = file_type
+        self.doc_id = doc_id
+        self.collection = collection
+        self.status = 'queued'  # queued, extracting, embedding, done, failed
+        self.page_count = 0
+        self.pages_extracted = 0
+        self.chunks_embedded = 0
+        self.record = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+
+    @property
+    def is_finished(self):
+        """Whether the job has stopped running, successfully or not."""
+        return self.status in ('done', 'failed')
+
+    def progress_text(self):
+        """
+        Describe the job's progress for display.
+
+        Returns:
+            str: Short human readable status
+        """
+        if self.status == 'queued':
+            return "Waiting to start..."
+        if self.status == 'extracting':
+            return f"Extracting text: {self.pages_extracted}/{self.page_count} pages"
+        if self.status == 'embedding':
+            return f"Indexing: {self.chunks_embedded} chunks embedded"
+        if self.status == 'failed':
+            return f"Failed: {self.error}"
+        return "Ready"
+
+
+class _MappedPdf:
+    """Read-only file over a memory-mapped stored PDF, carrying the upload's MIME type."""
+
+    def __init__(self, pdf_map, file_type):
+        self._map = pdf_map
+        self.type = file_type
+
+    def read(self, size=-1):
+        return self._map.read(size)
+
+    def seek(self, offset, whence=0):
+        self._map.seek(offset, whence)
+        return self._map.tell()
+
+    def tell(self):
+        return self._map.tell()
+
+
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix="ingest")
+_jobs = {}
+_lock = threading.Lock()
+
+
+def submit_ingestion_job(name, file_type, file_bytes):
+    """
+    Queue a document for extraction, chunking and embedding.
+
+    The bytes are written to the document store right away, so queued jobs
+    do not hold them in memory. A PDF that is already being processed reuses
+    that job, and one that is already fully indexed, under any filename and
+    by any session, finishes immediately without extracting or embedding.
+
+    Args:
+        name (str): Original filename
+        file_type (str): MIME type of the upload
+        file_bytes (bytes): Raw file content
+
+    Returns:
+        str: Job id to poll with get_ingestion_job
+    """
+    store = get_document_store()
+    doc_id = store.put_pdf(file_bytes)
+    store.collect_garbage()
+    return _submit_job(name, file_type, doc_id)
+
+
+def ensure_document_indexed(name, file_type, doc_id):
+    """
+    Re-index a stored document if its collection is gone, e.g. after eviction.
+
+    Cheap enough to call on every selection: an indexed document costs one
+    checkpoint lookup.
+
+    Args:
+        name (str): Original filename
+        file_type (str): MIME type of the upload
+        doc_id (str): Document id in the document store
+
+    Returns:
+        str or None: Id of the job rebuilding the index, or None if it is intact
+    """
+    if _find_indexed_document(doc_id, get_document_collection_name(doc_id)):
+        return None
+    return _submit_job(name, file_type, doc_id)
+
+
+def _submit_job(name, file_type, doc_id):
+    """Create a job for a stored document, finishing it at once if it is already indexed."""
+    collection_name = get_document_collection_name(doc_id)
+    indexed = _find_indexed_document(doc_id, collection_name)
+    now = time.time()
+
+    with _lock:
+        # Forget jobs whose results have long been picked up
+        for job_id, old_job in list(_jobs.items()):
+            if old_job.is_finished and now - old_job.finished > JOB_RETENTION_SECONDS:
+                del _jobs[job_id]
+
+        if not indexed:
+            for old_job in _jobs.values():
+                if old_job.collection == collection_name and not old_job.is_finished:
+                    return old_job.job_id
+
+        job = IngestionJob(name, file_type, doc_id, collection_name)
+        if indexed:
+            job.record = indexed
+            job.page_count = job.pages_extracted = indexed.page_count
+            job.chunks_embedded = indexed.chunk_count
+            job.status = 'done'
+            job.finished = now
+        _jobs[job.job_id] = job
+
+    if not indexed:
+        _executor.submit(_run_job, job)
+    elif not get_document_insights(indexed.content_hash):
+        # Insights of an earlier upload may have failed or been cut short by a
+        # restart; the text is only read back when they are missing
+        text = get_document_store().read_text(doc_id)
+        if text:
+            schedule_document_insights(text)
+    return job.job_id
+
+
+def get_ingestion_job(job_id):
+    """
+    Get a job by id.
+
+    Args:
+        job_id (str): Id returned by submit_ingestion_job
+
+    Returns:
+        IngestionJob or None: The job, or None if it is unknown or expired
+    """
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def _find_indexed_document(doc_id, collection_name):
+    """Get the record of a document whose text and chunks are all stored, or None."""
+    record = get_document_store().get_record(doc_id)
+    if not record:
+        return None
+    completed_count = get_ingest_checkpoint().completed_chunk_count(collection_name, record.content_hash)
+    if completed_count is None:
+        return None
+    # The checkpoint outlives the collection if the store was wiped, so check the rows too
+    collection = get_vector_collection(collection_name, create=False)
+    if collection is None or collection.count() < completed_count:
+        return None
+    get_collection_eviction_manager().touch(collection_name)
+    return record
+
+
+def _run_job(job):
+    """Extract, chunk and embed one document on a worker thread."""
+    try:
+        job.status = 'extracting'
+        store = get_document_store()
+        known = store.get_record(job.doc_id)
+
+        if known and store.page_count(job.doc_id):
+            # Extracted before (e.g. its collection was evicted since), so only embed again
+            job.record = known
+            job.page_count = job.pages_extracted = job.record.page_count
+            content = store.read_text(job.doc_id)
+            page_offsets = list(job.record.page_offsets)
+        else:
+            def on_pages(pages_extracted, page_count):
+                job.pages_extracted = pages_extracted
+                job.page_count = page_count
+
+            pdf_map = store.open_pdf(job.doc_id)
+            if pdf_map is None:
+                raise RuntimeError("stored PDF is missing")
+            try:
+                size = len(pdf_map)
+                content, page_offsets = extract_pdf_text(_MappedPdf(pdf_map, job.file_type), on_progress=on_pages)
+            finally:
+                pdf_map.close()
+
+            if not content or content.startswith("Error") or content.startswith("Invalid") or content == "No text content found in PDF":
+                job.record = build_document_record(None, job.page_count, size)
+                job.error = content
+                job.status = 'failed'
+                return
+
+            # Computed once here so the UI never re-parses the PDF
+            job.record = build_document_record(content, job.page_count, size, page_offsets)
+            ends = list(page_offsets[1:]) + [len(content)]
+            store.put_pages(job.doc_id, [content[start:end] for start, end in zip(page_offsets, ends)])
+            store.put_record(job.doc_id, job.record)
+
+        job.status = 'embedding'
+
+        def on_chunks(chunks_embedded):
+            job.chunks_embedded = chunks_embedded
+
+        document = {'name': job.name, 'collection': job.collection, 'content': content, 'page_offsets': page_offsets}
+        # Raises with the reason if the chunks could not all be stored
+        job.record.chunk_count = handle_file_upload(document, on_progress=on_chunks)
+        store.put_record(job.doc_id, job.record)
+        job.status = 'done'
+        # The new collection may push the store over its budget
+        get_collection_eviction_manager().enforce()
+    except Exception as e:
+        print(f"Error in ingestion job for {job.name}: {str(e)}")
+        job.error = str(e)
+        job.status = 'failed'
+    finally:
+        job.finished = time.time()
@@ -0,0 +1,112 @@
+import re
+from bisect import bisect_right
+from collections import deque
+from utils.count_tokens import count_tokens
+
+# Paragraph breaks inserted by _clean_pdf_text, or whitespace after a sentence end
+_BOUNDARY = re.compile(r'\n\s*\n|(?<=[.!?])\s+')
+_WORD = re.compile(r'\S+')
+
+
+def iter_chunks(text, max_tokens=200, overlap_tokens=30, page_offsets=None):
+    """
+    Split text into token-budgeted chunks without cutting sentences.
+
+    Sentences and paragraphs are packed into a chunk until the next one would
+    exceed the budget. A sentence longer than the budget on its own is split
+    on word boundaries. Consecutive chunks share up to `overlap_tokens` of
+    trailing sentences.
+
+    Args:
+        text (str): The text to chunk
+        max_tokens (int): Maximum number of tokens per chunk
+        overlap_tokens (int): Maximum number of tokens repeated from the previous chunk
+        page_offsets (list, optional): Character offset where each page starts in `text`
+
+    Yields:
+        dict: Chunk with 'index', 'text', 'start', 'end' (character offsets into
+              `text`) and 'page_start'/'page_end' (1-based, 0 if unknown)
+    """
+    window = deque()  # (start, end, tokens) of the sentences in the current chunk
+    window_tokens = 0
+    index = 0
+    pending = False  # whether the window holds sentences not yet emitted
+
+    for start, end, tokens in _iter_units(text, max_tokens):
+        # Budget one extra token for the separator between sentences
+        tokens += 1
+        if pending and window_tokens + tokens > max_tokens:
+            yield _make_chunk(text, index, window[0][0], window[-1][1], page_offsets)
+            index += 1
+            pending = False
+
+            # Keep trailing sentences as overlap for the next chunk
+            while window and (window_tokens > overlap_tokens or window_tokens + tokens > max_tokens):
+                window_tokens -= window.popleft()[2]
+
+        window.append((start, end, tokens))
+        window_tokens += tokens
+        pending = True
+
+    if pending:
+        yield _make_chunk(text, index, window[0][0], window[-1][1], page_offsets)
+
+
+def _iter_units(text, max_tokens):
+    """Yield (start, end, tokens) for each sentence, splitting oversized ones by words."""
+    position = 0
+    for match in _BOUNDARY.finditer(text):
+        yield from _split_unit(text, position, match.start(), max_tokens)
+        position = match.end()
+    yield from _split_unit(text, position, len(text), max_tokens)
+
+
+def _split_unit(text, start, end, max_tokens):
+    """Yield a stripped sentence span, or word-boundary pieces of it if it is too long."""
+    sentence = text[start:end]
+    stripped = sentence.strip()
+    if not stripped:
+        return
+
+    start += len(sentence) - len(sentence.lstrip())
+    end = start + len(stripped)
+    tokens = count_tokens(stripped)
+    if tokens <= max_tokens:
+        yield start, end, tokens
+        return
+
+    piece_start = None
+    piece_end = None
+    piece_tokens = 0
+    for word in _WORD.finditer(text, start, end):
+        word_tokens = count_tokens(word.group())
+        if piece_start is not None and piece_tokens + word_tokens > max_tokens:
+            yield piece_start, piece_end, count_tokens(text[piece_start:piece_end])
+            piece_start = None
+            piece_tokens = 0
+        if piece_start is None:
+            piece_start = word.start()
+        piece_end = word.end()
+        # Counting words separately slightly overestimates, which keeps pieces in budget
+        piece_tokens += word_tokens + 1
+
+    if piece_start is not None:
+        yield piece_start, piece_end, count_tokens(text[piece_start:piece_end])
+
+
+def _make_chunk(text, index, start, end, page_offsets):
+    """Build the chunk dictionary for the span [start, end)."""
+    if page_offsets:
+        page_start = bisect_right(page_offsets, start)
+        page_end = bisect_right(page_offsets, end - 1)
+    else:
+        page_start = page_end = 0
+
+    return {
+        'index': index,
+        'text': text[start:end],
+        'start': start,
+        'end': end,
+        'page_start': page_start,
+        'page_end': page_end
+    }
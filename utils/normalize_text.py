@@ -0,0 +1,57 @@
+import re
+
+# One pass over raw page text. Alternatives, tried in order at each position:
+#   marker - a numbered list item ("12.") followed by whitespace
+#   brk    - whitespace between a sentence end and a capital letter
+#   ws     - any other whitespace that is not already a single space
+_PAGE_TOKENS = re.compile(r'(?P<marker>\d+\.)(?=\s)|(?<=\w[.!?])(?P<brk>\s+)(?=[A-Z])|(?P<ws>\s{2,}|[^\S ])')
+
+
+def normalize_page_text(text):
+    """
+    Normalize the text of one PDF page in a single linear pass.
+
+    Produces the same output as collapsing whitespace, splitting sentences
+    into paragraphs and putting numbered items on their own paragraph with
+    separate regex passes, so pages can be normalized as they are streamed
+    and simply concatenated.
+
+    Args:
+        text (str): Raw text extracted from a PDF page
+
+    Returns:
+        str: Normalized page text
+    """
+    if not text:
+        return ""
+
+    # Position of the capital letter that started the last paragraph. A sentence
+    # ending right after it (e.g. "A. B. C") is not split again.
+    last_capital = -1
+
+    def replace(match):
+        nonlocal last_capital
+        kind = match.lastgroup
+        if kind == 'marker':
+            return '\n\n' + match.group()
+        if kind == 'brk' and match.start() - 2 != last_capital:
+            last_capital = match.end()
+            return '\n\n'
+        return ' '
+
+    return _PAGE_TOKENS.sub(replace, text).strip()
+
+
+def normalize_display_text(text):
+    """
+    Strip every line and drop blank lines in a single pass.
+
+    Args:
+        text (str): Text to tidy for display
+
+    Returns:
+        str: Text with trimmed lines and no blank lines
+    """
+    # Dropping empty lines already removes runs of blank lines, so no
+    # separate collapse pass is needed
+    return '\n'.join(filter(None, map(str.strip, text.split('\n'))))
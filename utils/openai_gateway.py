@@ -0,0 +1,259 @@
+import time
+import random
+import threading
+from openai import APIConnectionError, APIStatusError
+from utils.get_setting import get_setting
+
+# Priority lanes. Interactive requests (question embeddings and answers) are
+# admitted before bulk requests (ingestion embeddings and document insights)
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# Defaults for the OPENAI_RPM, OPENAI_TPM, OPENAI_MAX_IN_FLIGHT and
+# OPENAI_MAX_RETRIES settings
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200000
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_MAX_RETRIES = 6
+
+# Backoff before retry n is drawn uniformly from [0, min(MAX, BASE * 2**n)] seconds
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
+# Status codes worth retrying: timeouts, rate limits and server errors
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Budget that refills continuously up to its capacity.
+
+    Not thread-safe on its own; the gateway guards its buckets with its lock.
+    """
+
+    def __init__(self, capacity, per_seconds=60.0):
+        """
+        Args:
+            capacity (float): Budget available per `per_seconds`, and the most that can accumulate
+            per_seconds (float): Period over which the full capacity refills
+        """
+        self.capacity = float(capacity)
+        self.rate = self.capacity / per_seconds
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def refill(self):
+        """Add the budget accrued since the last refill."""
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` is available, 0 if it is available now."""
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount):
+        """Spend `amount`. The level may go negative after usage corrections."""
+        self.level -= min(amount, self.capacity)
+
+
+class OpenAIGateway:
+    """
+    Process-wide admission control and retries for OpenAI requests.
+
+    Every request waits until the requests-per-minute and tokens-per-minute
+    buckets can pay for it and fewer than `max_in_flight` requests are open.
+    Interactive requests go first: bulk requests wait while any interactive
+    request is waiting, and never take the last free slot, so a question is
+    not queued behind a document being ingested. Rate limits, timeouts,
+    connection errors and server errors are retried with jittered
+    exponential backoff, honouring Retry-After when the API sends it.
+    """
+
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 max_retries=DEFAULT_MAX_RETRIES):
+        """
+        Args:
+            rpm (int): Requests allowed per minute
+            tpm (int): Tokens allowed per minute
+            max_in_flight (int): Maximum number of requests open at once
+            max_retries (int): Retries of a failed request before its error is raised
+        """
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_retries = max_retries
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._in_flight = 0
+        self._waiting = {INTERACTIVE: 0, BULK: 0}
+        self._condition = threading.Condition()
+        self._stats = {lane: {'requests': 0, 'retries': 0, 'failures': 0, 'wait_seconds': 0.0}
+                       for lane in (INTERACTIVE, BULK)}
+
+    def call(self, request, tokens=0, priority=INTERACTIVE):
+        """
+        Send a request once the budgets allow it, retrying transient errors.
+
+        Args:
+            request (callable): Makes the API call and returns its response
+            tokens (int): Estimated tokens used by the request
+            priority (str): INTERACTIVE or BULK
+
+        Returns:
+            The response returned by `request`
+
+        Raises:
+            Exception: The last error if the request still fails after all retries
+        """
+        for attempt in range(self.max_retries + 1):
+            self._acquire(tokens, priority)
+            try:
+                response = request()
+            except Exception as e:
+                self._release()
+                self._retry_or_raise(e, attempt, priority)
+                continue
+            self._release()
+            self._correct_usage(tokens, response)
+            return response
+
+    def stream(self, request, tokens=0, priority=INTERACTIVE):
+        """
+        Send a streaming request and yield its events, holding a slot until it ends.
+
+        Only opening the stream is retried; an error after the first event is
+        raised, since its events were already passed on.
+
+        Args:
+            request (callable): Opens the stream and returns it
+            tokens (int): Estimated tokens used by the request
+            priority (str): INTERACTIVE or BULK
+
+        Yields:
+            The events of the stream
+        """
+        for attempt in range(self.max_retries + 1):
+            self._acquire(tokens, priority)
+            try:
+                stream = request()
+            except Exception as e:
+                self._release()
+                self._retry_or_raise(e, attempt, priority)
+                continue
+            try:
+                yield from stream
+            finally:
+                self._release()
+            return
+
+    def stats(self):
+        """
+        Get per-lane counters.
+
+        Returns:
+            dict: For each lane, requests sent, retries, failed requests and
+                  seconds spent waiting for budget or a free slot, plus the
+                  number of requests in flight
+        """
+        with self._condition:
+            stats = {lane: dict(counters) for lane, counters in self._stats.items()}
+            stats['in_flight'] = self._in_flight
+            return stats
+
+    def _acquire(self, tokens, priority):
+        """Block until the request may be sent, then take its slot and budget."""
+        started = time.monotonic()
+        with self._condition:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    self._requests.refill()
+                    self._tokens.refill()
+                    if priority == BULK:
+                        # Leave the last slot free for interactive requests
+                        blocked = self._waiting[INTERACTIVE] > 0 or self._in_flight >= max(1, self.max_in_flight - 1)
+                    else:
+                        blocked = self._in_flight >= self.max_in_flight
+                    delay = max(self._requests.wait_time(1), self._tokens.wait_time(tokens))
+                    if not blocked and delay == 0:
+                        break
+                    # Slots are announced by notify; budgets refill on their own
+                    self._condition.wait(timeout=delay if not blocked else None)
+                self._requests.take(1)
+                self._tokens.take(tokens)
+                self._in_flight += 1
+                self._stats[priority]['requests'] += 1
+                self._stats[priority]['wait_seconds'] += time.monotonic() - started
+            finally:
+                self._waiting[priority] -= 1
+                # A departing interactive waiter may unblock bulk requests
+                self._condition.notify_all()
+
+    def _release(self):
+        """Free the slot of a finished request."""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _correct_usage(self, estimated, response):
+        """Charge the token bucket for the tokens the API reports, not the estimate."""
+        usage = getattr(response, 'usage', None)
+        used = getattr(usage, 'total_tokens', None)
+        if isinstance(used, int) and used != estimated:
+            with self._condition:
+                self._tokens.level -= used - min(estimated, self._tokens.capacity)
+
+    def _retry_or_raise(self, error, attempt, priority):
+        """Sleep before the next attempt if the error is transient, otherwise raise it."""
+        retryable = isinstance(error, APIConnectionError) or (
+            isinstance(error, APIStatusError) and error.status_code in RETRYABLE_STATUS
+        )
+        with self._condition:
+            if not retryable or attempt >= self.max_retries:
+                self._stats[priority]['failures'] += 1
+                raise error
+            self._stats[priority]['retries'] += 1
+
+        delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        print(f"OpenAI request failed ({error.__class__.__name__}), retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def _retry_after(error):
+    """Seconds the API asked to wait before retrying, or None."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    try:
+        return min(float(response.headers.get('retry-after')), BACKOFF_MAX_SECONDS)
+    except (TypeError, ValueError):
+        return None
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_openai_gateway():
+    """
+    Get the process-wide OpenAI gateway, creating it on first use.
+
+    The budgets come from the OPENAI_RPM, OPENAI_TPM, OPENAI_MAX_IN_FLIGHT
+    and OPENAI_MAX_RETRIES settings.
+
+    Returns:
+        OpenAIGateway: Shared gateway
+    """
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = OpenAIGateway(
+                rpm=int(get_setting("OPENAI_RPM", DEFAULT_RPM)),
+                tpm=int(get_setting("OPENAI_TPM", DEFAULT_TPM)),
+                max_in_flight=int(get_setting("OPENAI_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)),
+                max_retries=int(get_setting("OPENAI_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+            )
+        return _gateway
@@ -1,39 +1,82 @@
 import PyPDF2
-import re
+import io
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from utils.normalize_text import normalize_page_text
 
-def process_pdf_content(uploaded_file):
+# Files with at least this many pages are extracted on a process pool
+PARALLEL_PAGE_THRESHOLD = 64
+
+def process_pdf_content(uploaded_file, on_progress=None):
     """
     Extract text content from uploaded PDF file with better formatting.
     
     Args:
         uploaded_file: Streamlit uploaded file object
+        on_progress (callable, optional): Called with (pages_extracted, page_count)
+                                          after each page
         
     Returns:
         str: Extracted text content
     """
+    content, _ = extract_pdf_text(uploaded_file, on_progress)
+    return content
+
+
+def extract_pdf_text(uploaded_file, on_progress=None):
+    """
+    Extract text content from uploaded PDF file along with where each page starts.
+
+    The page index lets callers slice out single pages (for previews or chunk
+    page numbers) without re-parsing the PDF or re-scanning the text.
+    
+    Args:
+        uploaded_file: Streamlit uploaded file object
+        on_progress (callable, optional): Called with (pages_extracted, page_count)
+                                          after each page
+        
+    Returns:
+        tuple: (content, page_offsets). content is the extracted text, or an error
+               message; page_offsets lists the character offset in content where
+               each page starts, and is empty if no text was extracted.
+    """
     content = ""
+    page_offsets = []
     
     if uploaded_file.type == "application/pdf":
         try:
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            for page_num, page in enumerate(pdf_reader.pages):
-                try:
-                    text = page.extract_text()
-                    if text:
-                        # Clean up the extracted text
-                        cleaned_text = _clean_pdf_text(text)
-                        content += cleaned_text + ""
-                except Exception as e:
-                    print(f"Error extracting text from page {page_num + 1}: {str(e)}")
-                    continue
+            # Collect page texts and join once instead of growing a string per page
+            page_texts = []
+            page_count = 0
+            offset = 0
+            
+            def set_page_count(count):
+                nonlocal page_count
+                page_count = count
+            
+            for page_num, text in iter_pdf_pages(uploaded_file, on_page_count=set_page_count):
+                page_offsets.append(offset)
+                page_texts.append(text)
+                offset += len(text)
+                if on_progress:
+                    on_progress(page_num, page_count)
+            content = "".join(page_texts)
             
             if not content.strip():
                 content = "No text content found in PDF"
+                page_offsets = []
             else:
-                # Final cleanup
-                content = _final_text_cleanup(content)
+                # Pages are already normalized, so concatenating them needs no
+                # further cleanup beyond trimming the ends
+                stripped = content.strip()
+                leading = len(content) - len(content.lstrip())
+                page_offsets = [min(max(start - leading, 0), len(stripped)) for start in page_offsets]
+                content = stripped
                 
         except Exception as e:
+            page_offsets = []
             if "Odd-length string" in str(e):
                 content = f"Error reading PDF: {str(e)}\n\nThis PDF contains formatting issues that prevent proper text extraction. Please try converting the PDF to a different format or use a different PDF reader."
             else:
@@ -41,41 +84,99 @@ def process_pdf_content(uploaded_file):
     else:
         content = "Invalid file type - only PDF files are supported"
     
-    return content
+    return content, page_offsets
 
 
-def _clean_pdf_text(text):
-    """Clean and format text extracted from PDF."""
-    if not text:
-        return ""
+def iter_pdf_pages(pdf_file, workers=None, pages_per_task=16, on_page_count=None):
+    """
+    Extract and clean PDF text page by page.
     
-    # Remove extra whitespace and normalize line breaks
-    text = re.sub(r'\s+', ' ', text)
+    Small files are read serially. Files with at least PARALLEL_PAGE_THRESHOLD
+    pages are split into page ranges that run on a process pool; only a window
+    of ranges is in flight at once, so memory stays bounded by that window
+    rather than by the whole document.
     
-    # Fix common PDF extraction issues
-    text = text.replace('\n\n', '')
+    Args:
+        pdf_file: PDF file object or raw PDF bytes
+        workers (int, optional): Number of worker processes. Defaults to the CPU count
+        pages_per_task (int): Number of pages each worker task extracts
+        on_page_count (callable, optional): Called once with the number of pages
+                                            before the first page is yielded
+        
+    Yields:
+        tuple: (page_number, cleaned_text) in page order, 1-based. Pages without
+               extractable text yield an empty string.
+    """
+    if isinstance(pdf_file, (bytes, bytearray)):
+        pdf_file = io.BytesIO(pdf_file)
     
-    # Remove multiple spaces
-    text = re.sub(r' +', ' ', text)
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    page_count = len(pdf_reader.pages)
+    workers = workers or os.cpu_count() or 1
+    if on_page_count:
+        on_page_count(page_count)
     
-    # Try to recreate paragraphs by looking for sentence endings
-    text = re.sub(r'(\w+[.!?])\s+([A-Z])', r'\1\n\n\2', text)
+    if workers < 2 or page_count < PARALLEL_PAGE_THRESHOLD:
+        for page_num, page in enumerate(pdf_reader.pages):
+            yield page_num + 1, _extract_page_text(page, page_num)
+        return
     
-    # Fix numbered lists
-    text = re.sub(r'(\d+\.\s+)', r'\n\1', text)
+    pdf_file.seek(0)
+    pdf_bytes = pdf_file.read()
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+    window = workers * 2
     
-    return text.strip()
+    # Spawn instead of fork: the Streamlit server process is multi-threaded
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(ranges)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_page_worker,
+        initargs=(pdf_bytes,)
+    ) as executor:
+        pending = deque()
+        next_range = 0
+        
+        while pending or next_range < len(ranges):
+            # Keep the window full, then wait for the oldest range to keep page order
+            while next_range < len(ranges) and len(pending) < window:
+                pending.append(executor.submit(_extract_page_range, *ranges[next_range]))
+                next_range += 1
+            
+            for page_num, text in pending.popleft().result():
+                yield page_num, text
 
 
-def _final_text_cleanup(content):
-    """Final cleanup of the entire document content."""
-    # Remove excessive blank lines
-    content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)
-    
-    # Ensure proper spacing around numbered items
-    content = re.sub(r'\n(\d+\.)', r'\n\n\1', content)
-    
-    # Clean up any remaining multiple spaces (but preserve single spaces)
-    content = re.sub(r' +', ' ', content)
-    
-    return content.strip()
+_worker_reader = None
+
+
+def _init_page_worker(pdf_bytes):
+    """Open the PDF once per worker process."""
+    global _worker_reader
+    _worker_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+
+
+def _extract_page_range(start, end):
+    """Extract and clean pages [start, end) inside a worker process."""
+    return [
+        (page_num + 1, _extract_page_text(_worker_reader.pages[page_num], page_num))
+        for page_num in range(start, end)
+    ]
+
+
+def _extract_page_text(page, page_num):
+    """Extract and clean the text of a single page, returning "" on failure."""
+    try:
+        text = page.extract_text()
+        if text:
+            # Clean up the extracted text
+            return _clean_pdf_text(text)
+    except Exception as e:
+        print(f"Error extracting text from page {page_num + 1}: {str(e)}")
+    return ""
+
+
+def _clean_pdf_text(text):
+    """Clean and format text extracted from PDF."""
+    # Whitespace collapsing, paragraph breaks after sentences and numbered
+    # list breaks all happen in one pass
+    return normalize_page_text(text)
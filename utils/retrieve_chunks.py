@@ -0,0 +1,126 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from utils.handle_db import get_vector_collection
+from utils.embedders import get_collection_embedder
+from utils.get_embeddings import get_embeddings
+from utils.collection_eviction import get_collection_eviction_manager
+
+
+def retrieve_chunks(question, collection_names, top_k=4, max_workers=8):
+    """
+    Query several collections concurrently and keep the best chunks overall.
+
+    Every collection is asked for its own top `top_k`, so the global top `top_k`
+    is exact even if all of the best chunks come from a single document. The
+    question is embedded once per embedder used by the collections. Collections
+    are first asked for ids and distances only; texts and metadata are then
+    read for the global winners alone, so searching many documents does not
+    read `top_k` texts from each of them.
+
+    Args:
+        question (str): The question to find relevant chunks for
+        collection_names (list): Names of the collections to search
+        top_k (int): Number of chunks to return across all collections
+        max_workers (int): Maximum number of concurrent collection queries
+
+    Returns:
+        tuple: (hits, skipped). Hits are sorted by ascending distance, each a dict
+               with 'id', 'document', 'distance', 'metadata' and 'collection'.
+               Skipped lists the collections that could not be searched because
+               they are missing or evicted, or their query failed
+    """
+    # Resolve handles up front; they are cached, and lookup errors surface in the UI thread.
+    # Collections not built yet are skipped rather than created without their embedder
+    collections = []
+    skipped = []
+    for name in dict.fromkeys(collection_names):
+        collection = get_vector_collection(name, create=False)
+        if collection:
+            collections.append(collection)
+        else:
+            skipped.append(name)
+    if not collections:
+        return [], skipped
+
+    # Recently queried collections are the last to be evicted
+    eviction_manager = get_collection_eviction_manager()
+    for collection in collections:
+        eviction_manager.touch(collection.name)
+
+    # Each collection must be queried in the vector space of the embedder that built it
+    query_embeddings = {}
+    targets = []
+    for collection in collections:
+        embedder = get_collection_embedder(collection)
+        if embedder.model_id not in query_embeddings:
+            query_embeddings[embedder.model_id] = get_embeddings(question, embedder)
+        if query_embeddings[embedder.model_id]:
+            targets.append((collection, query_embeddings[embedder.model_id]))
+        else:
+            skipped.append(collection.name)
+    if not targets:
+        return [], skipped
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(targets))) as executor:
+        results = list(executor.map(lambda target: _query_collection(target[0], target[1], top_k), targets))
+        skipped.extend(target[0].name for target, collection_hits in zip(targets, results) if collection_hits is None)
+        hits = heapq.nsmallest(
+            top_k,
+            (hit for collection_hits in results if collection_hits for hit in collection_hits),
+            key=lambda hit: hit['distance']
+        )
+
+        # Read the texts of the winning chunks, one lookup per collection that has any
+        winners = {}
+        for hit in hits:
+            winners.setdefault(hit['collection'], []).append(hit)
+        collections_by_name = {collection.name: collection for collection in collections}
+        list(executor.map(lambda name: _fill_hits(collections_by_name[name], winners[name]), winners))
+
+    return [hit for hit in hits if hit['document'] is not None], skipped
+
+
+def _query_collection(collection, query_embedding, n_results):
+    """Query one collection for ids and distances and flatten them into hit dictionaries, or None on error."""
+    try:
+        results = collection.query(
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            include=["distances"]
+        )
+    except Exception as e:
+        print(f"Error querying collection '{collection.name}': {str(e)}")
+        return None
+
+    if not results or not results.get('ids'):
+        return []
+
+    return [
+        {
+            'id': chunk_id,
+            'document': None,
+            'distance': distance,
+            'metadata': {},
+            'collection': collection.name
+        }
+        for chunk_id, distance in zip(results['ids'][0], results['distances'][0])
+    ]
+
+
+def _fill_hits(collection, hits):
+    """Read the text and metadata of hits from their collection."""
+    try:
+        results = collection.get(ids=[hit['id'] for hit in hits], include=["documents", "metadatas"])
+    except Exception as e:
+        print(f"Error reading chunks from collection '{collection.name}': {str(e)}")
+        return
+
+    metadatas = results.get('metadatas') or [None] * len(results['ids'])
+    found = {
+        chunk_id: (document, metadata)
+        for chunk_id, document, metadata in zip(results['ids'], results['documents'], metadatas)
+    }
+    for hit in hits:
+        if hit['id'] in found:
+            hit['document'], metadata = found[hit['id']]
+            hit['metadata'] = metadata or {}
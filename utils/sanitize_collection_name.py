@@ -1,5 +1,6 @@
 import re
 import hashlib
+from utils.get_setting import get_setting
 
 def sanitize_collection_name(filename):
     """
@@ -44,4 +45,36 @@ def sanitize_collection_name(filename):
         hash_suffix = hashlib.md5(filename.encode()).hexdigest()[:8]
         sanitized = sanitized[:500] + '_' + hash_suffix
     
-    return sanitized 
\ No newline at end of file
+    return sanitized 
+
+
+def get_collection_namespace():
+    """
+    Get the namespace that prefixes this deployment's collection names.
+
+    Tenants sharing a vector store set different NAMESPACE settings so they
+    never see or clear each other's collections. Sessions of one tenant share
+    the namespace, so identical PDFs are still indexed only once.
+
+    Returns:
+        str: Namespace made of [a-zA-Z0-9_-]
+    """
+    namespace = re.sub(r'[^a-zA-Z0-9_-]', '_', str(get_setting("NAMESPACE", "default")))
+    return namespace.strip('_-') or "default"
+
+
+def get_document_collection_name(doc_id, namespace=None):
+    """
+    Get the collection name for a document from its content hash.
+
+    Renamed copies of a PDF share one collection, and different files whose
+    names sanitize alike never collide.
+
+    Args:
+        doc_id (str): SHA-256 hex digest of the PDF bytes
+        namespace (str, optional): Collection namespace. Defaults to get_collection_namespace()
+
+    Returns:
+        str: Valid ChromaDB collection name
+    """
+    return f"{namespace or get_collection_namespace()}.doc_{doc_id[:32]}"
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import threading
+
+# Eviction frees this fraction of the limit beyond what is needed, so it
+# does not run again on every insert
+EVICTION_HEADROOM = 0.1
+
+
+class SQLiteStore:
+    """
+    Base of the small SQLite databases kept under ./notebook_cache.
+
+    One connection is shared by every thread of the process and guarded by
+    `self._lock`. The database runs in WAL mode, so other processes can read
+    while this one writes. Subclasses list the statements creating their
+    tables and indexes in SCHEMA.
+    """
+
+    SCHEMA = ()
+
+    def __init__(self, path):
+        """
+        Open (or create) the database and its schema.
+
+        Args:
+            path (str): SQLite file; its directory is created if missing
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in self.SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def shared_instance(create, description=None):
+    """
+    Build a getter for a process-wide object created on first use.
+
+    Args:
+        create (callable): Creates the object
+        description (str, optional): If given, a failure to create the object
+                                     is printed as a warning and the getter
+                                     returns None, trying again on the next call.
+                                     Otherwise the error is raised
+
+    Returns:
+        callable: Getter returning the shared object
+    """
+    instance = []
+    lock = threading.Lock()
+
+    def get():
+        with lock:
+            if not instance:
+                try:
+                    instance.append(create())
+                except Exception as e:
+                    if description is None:
+                        raise
+                    print(f"Warning: {description} unavailable: {e}")
+                    return None
+            return instance[0]
+
+    return get
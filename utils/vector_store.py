@@ -0,0 +1,537 @@
+import os
+import json
+import shutil
+import threading
+import numpy as np
+from utils.client_registry import get_chroma_client, get_collection_handle, forget_collections
+from utils.get_setting import get_setting
+
+DEFAULT_VECTOR_STORE = "chroma"
+
+# Storage types for NumPy collection vectors. float16 only saves memory and
+# disk: NumPy has no fast half-precision arithmetic, so its rows are widened
+# before scoring and queries take several times longer than float32. int8
+# is smaller still and scores nearly as fast as float32
+PRECISIONS = {
+    'float32': np.float32,
+    'float16': np.float16,
+    'int8': np.int8,
+}
+
+# With re-ranking, this many candidates per requested result are re-scored in full precision
+RERANK_CANDIDATES = 4
+
+# Rough size of one stored chunk's text, ids and metadata, for estimating Chroma collection sizes
+CHROMA_CHUNK_OVERHEAD_BYTES = 1500
+
+# Quantized rows are widened to float32 for scoring this many at a time;
+# small blocks keep the widened copy in cache
+SCORE_BLOCK_ROWS = 256
+
+
+class ChromaVectorStore:
+    """Collections stored in a persistent ChromaDB database with an HNSW index."""
+
+    def __init__(self, persist_directory="./chrome_store"):
+        """
+        Args:
+            persist_directory (str): Directory to persist ChromaDB data
+        """
+        self.persist_directory = persist_directory
+
+    def get_collection(self, collection_name, metadata=None, create=True):
+        """
+        Get or create a collection.
+
+        Args:
+            collection_name (str): Name of the collection
+            metadata (dict, optional): Metadata recorded if the collection is created
+            create (bool): Create the collection if it does not exist
+
+        Returns:
+            Collection or None: ChromaDB collection, or None if it does not exist
+                                and create is False
+        """
+        return get_collection_handle(collection_name, self.persist_directory, metadata, create)
+
+    def list_collections(self):
+        """
+        List the names of all stored collections.
+
+        Returns:
+            list: Collection names
+        """
+        return [collection.name for collection in get_chroma_client(self.persist_directory).list_collections()]
+
+    def collection_size(self, collection_name):
+        """
+        Estimate the bytes a collection takes on disk.
+
+        Chroma keeps no per-collection file, so this counts a float32 vector and
+        CHROMA_CHUNK_OVERHEAD_BYTES of text, ids and metadata per chunk.
+
+        Args:
+            collection_name (str): Name of the collection
+
+        Returns:
+            int: Estimated size in bytes
+        """
+        collection = self.get_collection(collection_name)
+        dimension = (collection.metadata or {}).get('dimension', 1536)
+        return collection.count() * (dimension * 4 + CHROMA_CHUNK_OVERHEAD_BYTES)
+
+    def delete_collection(self, collection_name):
+        """
+        Delete a collection and everything stored in it.
+
+        Args:
+            collection_name (str): Name of the collection
+        """
+        forget_collections(collection_name, self.persist_directory)
+        try:
+            get_chroma_client(self.persist_directory).delete_collection(name=collection_name)
+        except Exception as e:
+            print(f"Collection '{collection_name}' not found or already deleted: {str(e)}")
+
+
+class NumpyCollection:
+    """
+    Exact nearest-neighbour collection kept in a memory-mapped NumPy matrix.
+
+    Layout of the collection directory:
+        collection.json  metadata, vector dimension, precision and re-rank flag
+        vectors.npy      matrix of L2-normalized embeddings, one row per chunk,
+                         stored as float32, float16 or int8
+        scales.npy       per-row float32 scale of int8 vectors
+        full.npy         float32 copy of quantized vectors, kept only for re-ranking
+        documents.bin    UTF-8 chunk texts, appended back to back
+        rows.jsonl       one line per write: id, row, text offset/length and metadata
+
+    A query is a single matrix-vector product over the mapped rows. Distances
+    are squared L2 between normalized vectors (2 - 2 * cosine), the same scale
+    Chroma reports for its default space. Quantized rows are scored directly
+    (int8 codes times their row scale); with re-ranking, the best candidates
+    are re-scored from full.npy, whose pages are only read for those rows.
+    Matrices grow by doubling, and rows.jsonl is appended last, so a write
+    interrupted half way is ignored on the next open.
+
+    Implements the subset of the ChromaDB collection API the app uses:
+    name, metadata, count, upsert, get and query.
+    """
+
+    def __init__(self, directory, name, metadata=None, precision="float32", rerank=False):
+        """
+        Open (or create) a collection.
+
+        Precision and re-ranking are fixed when the collection is created;
+        an existing collection keeps its own.
+
+        Args:
+            directory (str): Directory holding the collection files
+            name (str): Collection name
+            metadata (dict, optional): Metadata recorded if the collection is created
+            precision (str): 'float32', 'float16' or 'int8'
+            rerank (bool): Keep float32 vectors to re-rank quantized candidates
+        """
+        self.name = name
+        self._directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        info_path = os.path.join(directory, "collection.json")
+        if os.path.exists(info_path):
+            with open(info_path, encoding="utf-8") as f:
+                info = json.load(f)
+        else:
+            if precision not in PRECISIONS:
+                raise ValueError(f"Unknown vector precision '{precision}'")
+            info = {'metadata': metadata or {}, 'dimension': None, 'precision': precision,
+                    'rerank': bool(rerank) and precision != 'float32'}
+            self._write_json(info_path, info)
+        self.metadata = info['metadata'] or None
+        self._dimension = info['dimension']
+        self._precision = info.get('precision', 'float32')
+        self._rerank = info.get('rerank', False)
+
+        # Later lines for the same id replace earlier ones
+        self._rows = {}
+        rows_path = os.path.join(directory, "rows.jsonl")
+        if os.path.exists(rows_path):
+            valid_length = 0
+            with open(rows_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    self._rows[entry['id']] = entry
+                    valid_length += len(line)
+            # Drop the torn tail of an interrupted write so later appends stay readable
+            if valid_length != os.path.getsize(rows_path):
+                with open(rows_path, "r+b") as f:
+                    f.truncate(valid_length)
+        self._size = max((entry['row'] for entry in self._rows.values()), default=-1) + 1
+        self._ids_by_row = {entry['row']: chunk_id for chunk_id, entry in self._rows.items()}
+        # Rows no id points to, left by batches that repeated an id; they are never returned
+        self._orphans = np.array(sorted(set(range(self._size)) - set(self._ids_by_row)), dtype=np.int64)
+
+        self._vectors = None
+        self._scales = None
+        self._full = None
+        for attribute, filename, _, _ in self._matrix_files():
+            path = os.path.join(directory, filename)
+            if os.path.exists(path):
+                setattr(self, attribute, np.load(path, mmap_mode="r+"))
+
+    def count(self):
+        """
+        Get the number of stored chunks.
+
+        Returns:
+            int: Number of chunks
+        """
+        with self._lock:
+            return len(self._rows)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        """
+        Insert chunks, replacing any already stored under the same ids.
+
+        If an id appears more than once in the batch, its last occurrence wins.
+
+        Args:
+            ids (list): Chunk ids
+            embeddings (list): Embedding vectors, one per id
+            documents (list, optional): Chunk texts
+            metadatas (list, optional): Chunk metadata dictionaries
+        """
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        documents = documents or [""] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+
+        # Keep only the last occurrence of each id so it gets a single row
+        last = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        if len(last) != len(ids):
+            keep = sorted(last.values())
+            ids = [ids[i] for i in keep]
+            vectors = vectors[keep]
+            documents = [documents[i] for i in keep]
+            metadatas = [metadatas[i] for i in keep]
+
+        with self._lock:
+            if self._dimension is None:
+                self._dimension = vectors.shape[1]
+                self._write_json(os.path.join(self._directory, "collection.json"),
+                                 {'metadata': self.metadata or {}, 'dimension': self._dimension,
+                                  'precision': self._precision, 'rerank': self._rerank})
+            elif vectors.shape[1] != self._dimension:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match collection dimension {self._dimension}")
+
+            # Existing ids are overwritten in place, new ids are appended
+            rows = []
+            next_row = self._size
+            for chunk_id in ids:
+                entry = self._rows.get(chunk_id)
+                if entry is None:
+                    rows.append(next_row)
+                    next_row += 1
+                else:
+                    rows.append(entry['row'])
+            self._reserve(next_row)
+            if self._precision == 'int8':
+                scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+                self._vectors[rows] = np.rint(vectors / scales[:, None]).astype(np.int8)
+                self._scales[rows] = scales
+                self._scales.flush()
+            else:
+                self._vectors[rows] = vectors.astype(PRECISIONS[self._precision])
+            self._vectors.flush()
+            if self._full is not None:
+                self._full[rows] = vectors
+                self._full.flush()
+
+            with open(os.path.join(self._directory, "documents.bin"), "ab") as f:
+                offset = f.tell()
+                entries = []
+                for chunk_id, row, document, metadata in zip(ids, rows, documents, metadatas):
+                    data = document.encode("utf-8")
+                    f.write(data)
+                    entries.append({'id': chunk_id, 'row': row, 'offset': offset, 'length': len(data), 'metadata': metadata})
+                    offset += len(data)
+
+            with open(os.path.join(self._directory, "rows.jsonl"), "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+
+            for entry in entries:
+                self._rows[entry['id']] = entry
+                self._ids_by_row[entry['row']] = entry['id']
+            self._size = next_row
+
+    def get(self, ids, include=("documents", "metadatas")):
+        """
+        Look up stored chunks by id.
+
+        Args:
+            ids (list): Chunk ids. Ids that are not stored are left out
+            include (list): Fields to return besides ids
+
+        Returns:
+            dict: Results shaped like ChromaDB's, with flat lists
+        """
+        with self._lock:
+            entries = [self._rows[chunk_id] for chunk_id in ids if chunk_id in self._rows]
+            return {
+                'ids': [entry['id'] for entry in entries],
+                'documents': self._read_documents(entries) if "documents" in include else None,
+                'metadatas': [entry['metadata'] for entry in entries] if "metadatas" in include else None
+            }
+
+    def query(self, query_embeddings, n_results=10, include=("documents", "distances", "metadatas")):
+        """
+        Find the nearest chunks to each query embedding by exact search.
+
+        Args:
+            query_embeddings (list): Query vectors
+            n_results (int): Number of chunks to return per query
+            include (list): Fields to return besides ids
+
+        Returns:
+            dict: Results shaped like ChromaDB's, one inner list per query
+        """
+        queries = self._normalize(np.asarray(query_embeddings, dtype=np.float32))
+        results = {'ids': [], 'documents': [], 'distances': [], 'metadatas': []}
+
+        with self._lock:
+            size = self._size
+            for query in queries:
+                if not self._rows:
+                    top, distances = [], []
+                else:
+                    scores = self._scores(query, size)
+                    if len(self._orphans):
+                        scores[self._orphans] = -np.inf
+                    k = min(n_results, len(self._rows))
+                    if self._full is None:
+                        top = self._top(scores, k)
+                        top_scores = scores[top]
+                    else:
+                        # Re-score the best quantized candidates in full precision
+                        candidates = np.sort(self._top(scores, min(k * RERANK_CANDIDATES, len(self._rows))))
+                        exact = self._full[candidates] @ query
+                        best = self._top(exact, k)
+                        top, top_scores = candidates[best], exact[best]
+                    distances = (2.0 - 2.0 * top_scores).tolist()
+                entries = [self._rows[self._ids_by_row[row]] for row in top]
+                results['ids'].append([entry['id'] for entry in entries])
+                results['distances'].append(distances)
+                results['metadatas'].append([entry['metadata'] for entry in entries])
+                results['documents'].append(self._read_documents(entries) if "documents" in include else None)
+
+        return results
+
+    def close(self):
+        """Release the memory maps."""
+        with self._lock:
+            self._vectors = None
+            self._scales = None
+            self._full = None
+
+    def _scores(self, query, size):
+        """Cosine similarity of the query with the first `size` stored rows."""
+        if self._precision == 'float32':
+            return self._vectors[:size] @ query
+
+        scores = np.empty(size, dtype=np.float32)
+        block = np.empty((SCORE_BLOCK_ROWS, self._dimension), dtype=np.float32)
+        for start in range(0, size, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, size)
+            widened = block[:end - start]
+            widened[...] = self._vectors[start:end]
+            scores[start:end] = widened @ query
+        if self._scales is not None:
+            scores *= self._scales[:size]
+        return scores
+
+    @staticmethod
+    def _top(scores, k):
+        """Indices of the k highest scores, best first."""
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        return top[np.argsort(-scores[top])]
+
+    def _matrix_files(self):
+        """(attribute, filename, dtype, row shape) of every matrix the collection keeps."""
+        row_shape = (self._dimension,)
+        yield '_vectors', "vectors.npy", PRECISIONS[self._precision], row_shape
+        if self._precision == 'int8':
+            yield '_scales', "scales.npy", np.float32, ()
+        if self._rerank:
+            yield '_full', "full.npy", np.float32, row_shape
+
+    def _reserve(self, rows):
+        """Grow the matrix files by doubling until they hold `rows` rows."""
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if rows <= capacity:
+            return
+
+        new_capacity = max(rows, capacity * 2, 1024)
+        for attribute, filename, dtype, row_shape in self._matrix_files():
+            path = os.path.join(self._directory, filename)
+            tmp_path = path + ".tmp"
+            current = getattr(self, attribute)
+            grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=(new_capacity,) + row_shape)
+            if capacity:
+                grown[:capacity] = current
+            grown.flush()
+            del grown
+            setattr(self, attribute, None)
+            os.replace(tmp_path, path)
+            setattr(self, attribute, np.load(path, mmap_mode="r+"))
+
+    def _read_documents(self, entries):
+        """Read chunk texts from the documents file."""
+        if not entries:
+            return []
+        documents = []
+        with open(os.path.join(self._directory, "documents.bin"), "rb") as f:
+            for entry in entries:
+                f.seek(entry['offset'])
+                documents.append(f.read(entry['length']).decode("utf-8"))
+        return documents
+
+    @staticmethod
+    def _normalize(vectors):
+        """Scale rows to unit length so dot products are cosine similarities."""
+        vectors = np.atleast_2d(vectors)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    @staticmethod
+    def _write_json(path, data):
+        """Atomically replace a JSON file."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+
+class NumpyVectorStore:
+    """Collections stored as memory-mapped NumPy matrices, one directory each."""
+
+    def __init__(self, persist_directory="./vector_store", precision="float32", rerank=False):
+        """
+        Args:
+            persist_directory (str): Directory holding one subdirectory per collection
+            precision (str): Vector storage type of new collections:
+                             'float32', 'float16' or 'int8'
+            rerank (bool): Whether new quantized collections keep float32 vectors
+                           to re-rank their top candidates
+        """
+        self.persist_directory = persist_directory
+        self.precision = precision
+        self.rerank = rerank
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def get_collection(self, collection_name, metadata=None, create=True):
+        """
+        Get or create a collection.
+
+        Args:
+            collection_name (str): Name of the collection
+            metadata (dict, optional): Metadata recorded if the collection is created
+            create (bool): Create the collection if it does not exist
+
+        Returns:
+            NumpyCollection or None: The collection, or None if it does not exist
+                                     and create is False
+        """
+        with self._lock:
+            collection = self._collections.get(collection_name)
+            if collection is None:
+                directory = os.path.join(self.persist_directory, collection_name)
+                if not create and not os.path.exists(os.path.join(directory, "collection.json")):
+                    return None
+                collection = NumpyCollection(directory, collection_name, metadata, self.precision, self.rerank)
+                self._collections[collection_name] = collection
+            return collection
+
+    def list_collections(self):
+        """
+        List the names of all stored collections.
+
+        Returns:
+            list: Collection names
+        """
+        if not os.path.isdir(self.persist_directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.persist_directory)
+            if os.path.exists(os.path.join(self.persist_directory, name, "collection.json"))
+        )
+
+    def collection_size(self, collection_name):
+        """
+        Get the bytes a collection takes on disk, which is also what it can map into memory.
+
+        Args:
+            collection_name (str): Name of the collection
+
+        Returns:
+            int: Size in bytes
+        """
+        directory = os.path.join(self.persist_directory, collection_name)
+        try:
+            return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+        except OSError:
+            return 0
+
+    def delete_collection(self, collection_name):
+        """
+        Delete a collection and everything stored in it.
+
+        Args:
+            collection_name (str): Name of the collection
+        """
+        with self._lock:
+            collection = self._collections.pop(collection_name, None)
+            if collection:
+                collection.close()
+            shutil.rmtree(os.path.join(self.persist_directory, collection_name), ignore_errors=True)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(backend=None):
+    """
+    Get the shared vector store for a backend.
+
+    The NumPy backend stores new collections with the VECTOR_PRECISION setting
+    ('float32', 'float16' or 'int8') and re-ranks quantized results in full
+    precision if VECTOR_RERANK is true. float32 stays the default; float16
+    trades query speed for memory (see PRECISIONS).
+
+    Args:
+        backend (str, optional): 'chroma' or 'numpy'. Defaults to the VECTOR_STORE setting
+
+    Returns:
+        ChromaVectorStore or NumpyVectorStore: Configured vector store
+    """
+    if backend is None:
+        backend = get_setting("VECTOR_STORE", DEFAULT_VECTOR_STORE)
+    with _stores_lock:
+        store = _stores.get(backend)
+        if store is None:
+            if backend == "numpy":
+                store = NumpyVectorStore(
+                    precision=get_setting("VECTOR_PRECISION", "float32"),
+                    rerank=str(get_setting("VECTOR_RERANK", False)).lower() in ("1", "true", "yes")
+                )
+            else:
+                store = ChromaVectorStore()
+            _stores[backend] = store
+        return store
+